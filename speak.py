@@ -1,21 +1,130 @@
 import customtkinter as ctk
-import sounddevice as sd
 import queue
 import json
-import pyttsx3
+import math
 import threading
 import time
-from PIL import Image, ImageTk
-from vosk import Model, KaldiRecognizer
 import os
 from datetime import datetime
 import sys
 import tempfile
+from collections import OrderedDict
+import argparse
+import asyncio
+import bisect
+import concurrent.futures
+import hashlib
+import io
+import itertools
+import multiprocessing
+import shutil
+import sqlite3
+import struct
+import wave
+import zipfile
 
 # Configuration générale de l'application
 ctk.set_appearance_mode("System")  # Modes: "System", "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Thèmes: "blue", "green", "dark-blue"
 
+APP_NAME = "speak"
+
+# Modèles Vosk disponibles par langue
+MODEL_DIRS = {
+    "fr": "vosk-model-small-fr-0.22",
+    "en": "vosk-model-small-en-us-0.15",
+}
+LANGUAGE_NAMES = {"fr": "français", "en": "anglais"}
+
+# Modèles livrés en archives zip (build PyInstaller), extraits une seule fois
+MODEL_CACHE_DIR = "models"  # Sous-dossier du dossier de données utilisateur
+MODEL_MANIFEST_NAME = "manifest.json"  # Empreintes sha256 des archives
+MODEL_LOCK_STALE_S = 900  # Verrou d'extraction considéré abandonné au-delà (secondes)
+MODEL_LOCK_POLL = 0.2  # Attente entre deux essais de prise du verrou (secondes)
+
+# Mémoire maximale occupée par les modèles chargés (Mo)
+MODEL_MEMORY_BUDGET_MB = 1024
+
+# Nombre de recognizers préchauffés gardés par modèle
+RECOGNIZER_POOL_SIZE = 2
+
+# Paramètres audio
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 8000  # 0.5 seconde par bloc
+RING_CAPACITY_BLOCKS = 32  # Blocs en attente dans le tampon d'une source (16 s)
+
+# Intervalle minimal entre deux rafraîchissements du texte partiel
+PARTIAL_UI_INTERVAL_MS = 100
+
+# Détection d'activité vocale (mode continu)
+VAD_FRAME_MS = 20  # Durée d'une trame d'analyse
+VAD_MIN_RMS = 300  # Seuil d'énergie minimal (échelle int16)
+VAD_NOISE_RATIO = 3.0  # Rapport parole / bruit de fond
+VAD_MIN_SPEECH_MS = 200  # Durée minimale d'un énoncé
+VAD_SILENCE_MS = 800  # Silence marquant la fin d'un énoncé
+
+# Visualiseur de niveau audio
+VISUALIZER_BARS = 100  # Trames de 20 ms affichées (2 secondes)
+VISUALIZER_FPS = 15  # Fréquence maximale de rafraîchissement
+VISUALIZER_FLOOR_DB = -60.0  # Niveau affiché comme silence
+
+# Historique des transcriptions
+HISTORY_DB_NAME = "history.sqlite3"
+HISTORY_PAGE_SIZE = 50  # Entrées lues par requête
+HISTORY_CACHED_PAGES = 4  # Pages gardées en mémoire
+
+# Mode automatique: abandon anticipé de la langue la moins confiante
+AUTO_MIN_WORDS = 3  # Mots reconnus requis avant de comparer les langues
+AUTO_CONF_MARGIN = 0.15  # Écart de confiance moyenne par mot
+
+# Mode automatique: identification de la langue sur le début de l'énoncé
+LID_PROBE_MS = 1000  # Audio décodé par toutes les langues avant de choisir
+LID_AMBIGUOUS_RATIO = 0.8  # Score relatif à partir duquel une langue reste candidate
+LID_MAX_CANDIDATES = 2  # Langues décodées en entier lorsque l'identification est ambiguë
+
+# Mode commande: phrases reconnues par intention et par langue
+DEFAULT_COMMANDS = {
+    "stop": {"fr": ["arrête", "stop"], "en": ["stop"]},
+    "replay": {"fr": ["répète", "relis le dernier texte"], "en": ["repeat", "replay"]},
+    "clear": {"fr": ["efface l'historique"], "en": ["clear history"]},
+    "french": {"fr": ["en français"], "en": ["french"]},
+    "english": {"fr": ["en anglais"], "en": ["english"]},
+}
+COMMANDS_FILE_NAME = "commands.json"  # Remplace les phrases par défaut s'il existe
+COMMAND_MIN_CONFIDENCE = 0.6  # Confiance minimale pour retenir une intention
+
+# Instrumentation: bornes des histogrammes de latence par étape (secondes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PORT = 2701  # Port HTTP d'export des métriques (désactivé par défaut)
+
+# Synthèse vocale
+TTS_CACHE_SIZE = 64  # Textes rendus gardés en mémoire
+TTS_STALE_AFTER = 15.0  # Un texte en attente depuis plus longtemps est abandonné (s)
+
+# Blocs d'une source asynchrone pouvant attendre le décodage
+LISTEN_MAX_PENDING_BLOCKS = 8
+
+# Serveur de transcription local
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 2700
+SERVER_MAX_SESSIONS = 8
+
+# Transcription longue: découpage aux silences et décodage en parallèle
+LONGFORM_SEGMENT_S = 30  # Longueur visée d'un segment
+LONGFORM_MAX_SEGMENT_S = 60  # Longueur maximale d'un segment
+LONGFORM_MIN_SILENCE_MS = 300  # Silence préféré pour couper
+CONVERT_BLOCK_FRAMES = 65536  # Trames lues à la fois lors d'une conversion de format
+
+# Audio brut des derniers énoncés, gardé pour les redécoder dans une autre langue
+UTTERANCE_RING_SIZE = 10  # Énoncés retenus
+UTTERANCE_RING_SECONDS = 120  # Durée totale maximale retenue
+REDECODE_IN_BACKGROUND = True  # Décoder d'avance dans les autres langues chargées
+REDECODE_IDLE_POLL = 0.1  # Attente entre deux vérifications d'inactivité (s)
+
+# Capture multi-sources: flux décodés par processus avant d'en ajouter un autre
+CAPTURE_STREAMS_PER_PROCESS = 4
+CAPTURE_CLOSE_TIMEOUT_S = 5  # Attente de la fin d'un processus de décodage avant de le tuer
+
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -24,16 +133,1943 @@ def resource_path(relative_path):
     except Exception:
         base_path = os.path.abspath(".")
 
-    path = os.path.join(base_path, relative_path)
-    
-    # For PyInstaller, we might need to look in different places for different files
-    if not os.path.exists(path) and hasattr(sys, '_MEIPASS'):
-        # Try without joining with MEIPASS (some files might be in root)
-        path = os.path.abspath(relative_path)
-    
-    return path
+    path = os.path.join(base_path, relative_path)
+    
+    # For PyInstaller, we might need to look in different places for different files
+    if not os.path.exists(path) and hasattr(sys, '_MEIPASS'):
+        # Try without joining with MEIPASS (some files might be in root)
+        path = os.path.abspath(relative_path)
+    
+    return path
+
+def setup_vosk_environment():
+    """Rend libvosk visible au chargeur de DLL dans une build PyInstaller"""
+    if getattr(sys, 'frozen', False) and hasattr(os, 'add_dll_directory'):
+        # La DLL est extraite avec le reste du bundle: inutile de la recopier
+        vosk_dir = os.path.join(sys._MEIPASS, 'vosk')
+        if os.path.isdir(vosk_dir):
+            os.add_dll_directory(vosk_dir)
+
+def model_search_dirs():
+    """Dossiers contenant `models/`: à côté de l'exécutable, bundle, dossier courant"""
+    dirs = []
+    if getattr(sys, 'frozen', False):
+        dirs.append(os.path.dirname(sys.executable))
+    if hasattr(sys, '_MEIPASS'):
+        dirs.append(sys._MEIPASS)
+    dirs.append(os.path.abspath("."))
+    return dirs
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ModelCache:
+    """Cache persistant des modèles extraits de leurs archives
+
+    Un modèle est cherché sous forme de dossier (développement), sinon
+    d'archive `<nom>.zip` accompagnée d'un manifeste sha256. L'archive est
+    vérifiée puis extraite une seule fois dans le dossier de données, sous
+    un nom qui inclut son empreinte: les lancements suivants réutilisent
+    directement le dossier extrait, et une nouvelle version remplace
+    l'ancienne. Un fichier verrou évite que plusieurs processus lancés
+    ensemble vérifient et extraient chacun la même archive.
+    """
+
+    def __init__(self, root=None, search_dirs=None):
+        self.root = root or os.path.join(user_data_dir(), MODEL_CACHE_DIR)
+        self.search_dirs = search_dirs or model_search_dirs()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def manifest(models_dir):
+        try:
+            with open(os.path.join(models_dir, MODEL_MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def resolve(self, name):
+        """Retourne le dossier du modèle, en extrayant son archive si nécessaire"""
+        for base in self.search_dirs:
+            models_dir = os.path.join(base, "models")
+            directory = os.path.join(models_dir, name)
+            if os.path.isdir(directory):
+                return directory
+            archive = os.path.join(models_dir, f"{name}.zip")
+            if os.path.isfile(archive):
+                checksum = self.manifest(models_dir).get(name, {}).get("sha256")
+                return self.extract(name, archive, checksum)
+        raise FileNotFoundError(f"Model '{name}' not found in: {', '.join(self.search_dirs)}")
+
+    def extract(self, name, archive, checksum=None):
+        """Extrait une archive de modèle dans le cache si elle n'y est pas déjà"""
+        if checksum is None:
+            # Sans manifeste, la version est identifiée par la taille et la date
+            stat = os.stat(archive)
+            version = f"{stat.st_size:x}{int(stat.st_mtime):x}"
+        else:
+            version = checksum[:16]
+        target = os.path.join(self.root, f"{name}-{version}")
+        marker = os.path.join(target, ".complete")
+        if os.path.exists(marker):
+            return target
+        
+        os.makedirs(self.root, exist_ok=True)
+        lock_path = f"{target}.lock"
+        with self.lock:
+            # Un seul processus vérifie et extrait l'archive; les autres attendent son marqueur
+            while not self._try_lock(lock_path):
+                if os.path.exists(marker):
+                    return target
+                time.sleep(MODEL_LOCK_POLL)
+            try:
+                if os.path.exists(marker):
+                    return target
+                if checksum is not None and file_sha256(archive) != checksum:
+                    raise ValueError(f"Checksum mismatch for model archive: {archive}")
+                staging = tempfile.mkdtemp(prefix=f".{name}-", dir=self.root)
+                try:
+                    with zipfile.ZipFile(archive) as zf:
+                        zf.extractall(staging)
+                    with open(os.path.join(staging, ".complete"), "w", encoding="utf-8") as f:
+                        f.write(checksum or version)
+                    try:
+                        os.rename(staging, target)
+                    except OSError:
+                        # Un autre processus a terminé la même extraction
+                        if not os.path.exists(marker):
+                            raise
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+                
+                # Supprimer les versions précédentes de ce modèle
+                for entry in os.listdir(self.root):
+                    path = os.path.join(self.root, entry)
+                    if entry.rpartition("-")[0] == name and path != target and os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+            finally:
+                os.remove(lock_path)
+        return target
+
+    @staticmethod
+    def _try_lock(path):
+        """Prend le verrou d'extraction entre processus, retourne False s'il est déjà pris"""
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Verrou laissé par un processus interrompu pendant l'extraction
+            try:
+                if time.time() - os.path.getmtime(path) > MODEL_LOCK_STALE_S:
+                    os.remove(path)
+            except OSError:
+                pass
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+
+class RecognizerPool:
+    """Réserve de recognizers préchauffés pour un modèle
+
+    Les recognizers sont remis à zéro et réutilisés d'un énoncé à l'autre.
+    Si tous sont pris, un recognizer supplémentaire est créé plutôt que
+    d'attendre; il n'est conservé que s'il reste de la place dans la réserve.
+    """
+
+    def __init__(self, model, size=RECOGNIZER_POOL_SIZE, sample_rate=SAMPLE_RATE, grammar=None):
+        self.model = model
+        self.size = size
+        self.sample_rate = sample_rate
+        self.grammar = grammar  # liste JSON des phrases autorisées, ou None
+        self.idle = []
+        self.in_use = 0  # recognizers empruntés
+        self.lock = threading.Lock()
+        self.stats = {"created": 0, "creation_ms": 0.0, "acquired": 0, "reused": 0, "overflow": 0}
+        for _ in range(size):
+            self.idle.append(self._create())
+
+    def _create(self):
+        from vosk import KaldiRecognizer
+        start = time.perf_counter()
+        if self.grammar is None:
+            recognizer = KaldiRecognizer(self.model, self.sample_rate)
+        else:
+            recognizer = KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+        recognizer.SetWords(True)
+        # Mots des hypothèses partielles: nécessaires pour comparer les langues en cours d'énoncé
+        recognizer.SetPartialWords(True)
+        with self.lock:
+            self.stats["created"] += 1
+            self.stats["creation_ms"] += (time.perf_counter() - start) * 1000
+        return recognizer
+
+    def acquire(self):
+        """Emprunte un recognizer prêt à l'emploi"""
+        with self.lock:
+            self.stats["acquired"] += 1
+            self.in_use += 1
+            if self.idle:
+                self.stats["reused"] += 1
+                return self.idle.pop()
+            self.stats["overflow"] += 1
+        return self._create()
+
+    def release(self, recognizer):
+        """Remet à zéro un recognizer et le rend à la réserve"""
+        recognizer.Reset()
+        with self.lock:
+            self.in_use -= 1
+            if len(self.idle) < self.size:
+                self.idle.append(recognizer)
+
+class ModelRegistry:
+    """Charge les modèles Vosk à la demande et borne la mémoire utilisée
+
+    Les modèles sont gardés dans l'ordre d'utilisation; lorsque le budget
+    mémoire est dépassé, le moins récemment utilisé est libéré. Un modèle
+    évincé reste valide tant qu'un recognizer l'utilise encore.
+    """
+
+    def __init__(self, model_dirs=MODEL_DIRS, memory_budget_mb=MODEL_MEMORY_BUDGET_MB,
+                 pool_size=RECOGNIZER_POOL_SIZE, on_load=None, cache=None):
+        self.model_dirs = dict(model_dirs)
+        self.cache = cache or ModelCache()
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.pool_size = pool_size
+        self.on_load = on_load
+        self.models = OrderedDict()  # langue -> (réserve de recognizers, taille estimée)
+        self.grammar_pools = {}  # langue -> réserve de recognizers contraints, évincée avec le modèle
+        self.loading = {}  # langue -> threading.Event
+        self.lock = threading.Lock()
+
+    def languages(self):
+        return list(self.model_dirs)
+
+    def model_path(self, lang):
+        return self.cache.resolve(self.model_dirs[lang])
+
+    @staticmethod
+    def estimate_size(path):
+        """Estime l'empreinte mémoire d'un modèle d'après sa taille sur disque"""
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+        return total
+
+    def used_memory(self):
+        with self.lock:
+            return sum(size for _, size in self.models.values())
+
+    def is_loaded(self, lang):
+        with self.lock:
+            return lang in self.models
+
+    def fits(self, lang):
+        """Indique si le modèle peut être chargé sans évincer un autre"""
+        return self.used_memory() + self.estimate_size(self.model_path(lang)) <= self.memory_budget
+
+    def get(self, lang):
+        """Retourne le modèle de la langue, en le chargeant si nécessaire"""
+        return self.pool(lang).model
+
+    def pool(self, lang):
+        """Retourne la réserve de recognizers de la langue, en chargeant le modèle si nécessaire"""
+        while True:
+            with self.lock:
+                if lang in self.models:
+                    self.models.move_to_end(lang)
+                    return self.models[lang][0]
+                event = self.loading.get(lang)
+                if event is None:
+                    event = self.loading[lang] = threading.Event()
+                    break
+            # Un autre fil charge déjà ce modèle
+            event.wait()
+        
+        try:
+            from vosk import Model
+            path = self.model_path(lang)
+            size = self.estimate_size(path)
+            if self.on_load:
+                self.on_load(lang)
+            pool = RecognizerPool(Model(path), self.pool_size)
+            with self.lock:
+                self.models[lang] = (pool, size)
+                self._evict(keep=lang)
+            return pool
+        finally:
+            with self.lock:
+                del self.loading[lang]
+            event.set()
+
+    def grammar_pool(self, lang, grammar):
+        """Retourne une réserve de recognizers de la langue limités à une grammaire
+
+        Une seule grammaire est gardée par langue: une nouvelle remplace la
+        précédente sans recharger le modèle. La réserve est libérée quand le
+        modèle est évincé, pour ne pas le retenir hors du budget mémoire.
+        """
+        model = self.get(lang)
+        with self.lock:
+            pool = self.grammar_pools.get(lang)
+        if pool is not None and pool.model is model and pool.grammar == grammar:
+            return pool
+        pool = RecognizerPool(model, size=1, grammar=grammar)
+        with self.lock:
+            # Ne pas garder la réserve si le modèle a été évincé entre-temps
+            if lang in self.models and self.models[lang][0].model is model:
+                self.grammar_pools[lang] = pool
+        return pool
+
+    def busy(self):
+        """Indique si un recognizer d'un modèle chargé est en cours d'utilisation"""
+        with self.lock:
+            return any(pool.in_use for pool, _ in self.models.values()) \
+                or any(pool.in_use for pool in self.grammar_pools.values())
+
+    def stats(self):
+        """Statistiques des réserves de recognizers par langue"""
+        with self.lock:
+            return {lang: dict(pool.stats) for lang, (pool, _) in self.models.items()}
+
+    def preload(self, lang):
+        """Charge un modèle en arrière-plan"""
+        def _load():
+            try:
+                self.get(lang)
+            except Exception as e:
+                print(f"Error loading model {lang}: {e}")
+        threading.Thread(target=_load, daemon=True).start()
+
+    def _evict(self, keep):
+        used = sum(size for _, size in self.models.values())
+        for lang in list(self.models):
+            if used <= self.memory_budget:
+                break
+            if lang == keep:
+                continue
+            _, size = self.models.pop(lang)
+            self.grammar_pools.pop(lang, None)
+            used -= size
+
+# Permet de passer un memoryview à Vosk sans le copier en bytes (créé au premier usage)
+_ffi = None
+
+def _from_buffer(chunk):
+    global _ffi
+    if _ffi is None:
+        import cffi
+        _ffi = cffi.FFI()
+    return _ffi.from_buffer(chunk)
+
+class LatencyMetrics:
+    """Histogrammes de latence par étape de la chaîne, partagés entre fils
+
+    Étapes mesurées: "queue" (attente d'un bloc dans le tampon de la
+    source), "decode" (AcceptWaveform d'un bloc), "finalize" (fin de
+    l'énoncé jusqu'au texte final), "dispatch" (passage au fil Tk),
+    "tts_wait", "tts_render" et "tts_play" (synthèse vocale).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.stages = {}  # étape -> {"counts", "sum", "count", "max"}
+        self.last = {}  # étape -> dernière durée observée
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = {"counts": [0] * (len(self.buckets) + 1),
+                                             "sum": 0.0, "count": 0, "max": 0.0}
+            hist["counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+            hist["sum"] += seconds
+            hist["count"] += 1
+            hist["max"] = max(hist["max"], seconds)
+            self.last[stage] = seconds
+
+    def quantile(self, stage, q):
+        """Estimation d'un quantile: borne supérieure du seau qui l'atteint"""
+        with self.lock:
+            hist = self.stages.get(stage)
+            if not hist or not hist["count"]:
+                return None
+            rank = q * hist["count"]
+            seen = 0
+            for bound, count in zip(self.buckets, hist["counts"]):
+                seen += count
+                if seen >= rank:
+                    return min(bound, hist["max"])
+            return hist["max"]
+
+    def snapshot(self):
+        """Résumé JSON des étapes (durées en millisecondes)"""
+        with self.lock:
+            stages = {stage: dict(hist, counts=list(hist["counts"])) for stage, hist in self.stages.items()}
+            last = dict(self.last)
+        summary = {}
+        for stage, hist in stages.items():
+            p50, p95 = self.quantile(stage, 0.5), self.quantile(stage, 0.95)
+            summary[stage] = {
+                "count": hist["count"],
+                "mean_ms": round(hist["sum"] / hist["count"] * 1000, 3),
+                "p50_ms": round(p50 * 1000, 3),
+                "p95_ms": round(p95 * 1000, 3),
+                "max_ms": round(hist["max"] * 1000, 3),
+                "last_ms": round(last[stage] * 1000, 3),
+                "buckets": {str(bound): count for bound, count in
+                            zip(self.buckets + ("+Inf",), itertools.accumulate(hist["counts"]))},
+            }
+        return summary
+
+    def prometheus(self):
+        """Export au format texte de Prometheus"""
+        with self.lock:
+            stages = {stage: dict(hist, counts=list(hist["counts"])) for stage, hist in self.stages.items()}
+        name = f"{APP_NAME}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each pipeline stage",
+                 f"# TYPE {name} histogram"]
+        for stage, hist in sorted(stages.items()):
+            for bound, count in zip(self.buckets + ("+Inf",), itertools.accumulate(hist["counts"])):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Écrit les métriques dans un fichier (JSON si l'extension est .json)"""
+        content = json.dumps(self.snapshot(), indent=2) if path.endswith(".json") else self.prometheus()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+# Métriques du processus, alimentées par toutes les étapes
+METRICS = LatencyMetrics()
+
+# Fils partagés pour décoder en parallèle le début d'un énoncé dans chaque langue
+_probe_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="lid")
+
+async def serve_metrics(host=SERVER_HOST, port=METRICS_PORT, metrics=METRICS):
+    """Expose les métriques en HTTP: /metrics (Prometheus) et /metrics.json"""
+    async def handle(reader, writer):
+        try:
+            request = (await reader.readline()).split()
+            while (await reader.readline()).strip():
+                pass
+            path = request[1].decode("ascii", "replace") if len(request) > 1 else "/"
+            if path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", metrics.prometheus()
+            elif path == "/metrics.json":
+                status, content_type, body = "200 OK", "application/json", json.dumps(metrics.snapshot())
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "not found\n"
+            body = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+def utterance_confidence(segments):
+    """Confiance moyenne par mot d'un ensemble de résultats Vosk"""
+    confs = [word["conf"] for segment in segments
+             for word in segment.get("result", segment.get("partial_result", []))
+             if "conf" in word]
+    return sum(confs) / len(confs) if confs else 0.0
+
+class DecoderTrack:
+    """État de décodage d'une langue pour un énoncé"""
+
+    def __init__(self, lang, recognizer):
+        self.lang = lang
+        self.recognizer = recognizer
+        self.segments = []
+        self.partial = {}
+        self.endpoint = False
+        self.cancelled = False
+        self.decode_time = 0.0  # temps passé dans Vosk pour cet énoncé
+        self.lock = threading.Lock()
+
+    def feed(self, chunk):
+        """Décode un bloc audio (bytes ou memoryview)"""
+        if not isinstance(chunk, bytes):
+            chunk = _from_buffer(chunk)
+        start = time.perf_counter()
+        accepted = self.recognizer.AcceptWaveform(chunk)
+        elapsed = time.perf_counter() - start
+        self.decode_time += elapsed
+        METRICS.observe("decode", elapsed)
+        if accepted:
+            result = json.loads(self.recognizer.Result())
+            with self.lock:
+                self.segments.append(result)
+                self.partial = {}
+                self.endpoint = True
+        else:
+            partial = json.loads(self.recognizer.PartialResult())
+            with self.lock:
+                self.partial = partial
+
+    def finish(self):
+        """Récupère la fin du décodage"""
+        start = time.perf_counter()
+        result = json.loads(self.recognizer.FinalResult())
+        self.decode_time += time.perf_counter() - start
+        with self.lock:
+            self.segments.append(result)
+            self.partial = {}
+
+    def probe(self, audio_data):
+        """Décode le début d'un énoncé et retourne un score d'identification de langue
+
+        Le score est la durée couverte par les mots reconnus, pondérée par
+        leur confiance, rapportée à la durée de l'audio: le bon modèle
+        explique la plus grande partie de la parole avec des mots sûrs.
+        """
+        self.feed(audio_data)
+        self.finish()
+        duration = max(len(audio_data), 1) / 2 / SAMPLE_RATE
+        return sum(word.get("conf", 0.0) * (word["end"] - word["start"]) for word in self.words()) / duration
+
+    def restart(self):
+        """Oublie le décodage en cours pour reprendre l'énoncé depuis le début"""
+        self.recognizer.Reset()
+        with self.lock:
+            self.segments = []
+            self.partial = {}
+            self.endpoint = False
+
+    def text(self):
+        with self.lock:
+            parts = [s.get("text", "") for s in self.segments] + [self.partial.get("partial", "")]
+        return " ".join(t for t in parts if t)
+
+    def words(self):
+        """Mots reconnus avec leurs temps de début et de fin"""
+        with self.lock:
+            return [word for segment in self.segments for word in segment.get("result", [])]
+
+    def scored_words(self):
+        """Nombre de mots et confiance moyenne de l'hypothèse courante"""
+        with self.lock:
+            segments = self.segments + [self.partial]
+        confs = [w for s in segments for w in s.get("result", s.get("partial_result", [])) if "conf" in w]
+        return len(confs), utterance_confidence(segments)
+
+    def run(self, chunks):
+        """Boucle d'un fil de décodage (mode automatique)"""
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if not self.cancelled:
+                self.feed(chunk)
+        if not self.cancelled:
+            self.finish()
+
+class UtteranceDecoder:
+    """Décode un énoncé bloc par bloc avec un recognizer par langue
+
+    Avec plusieurs langues, le début de l'énoncé (LID_PROBE_MS) est d'abord
+    décodé en parallèle par chaque modèle pour identifier la langue; seule
+    la gagnante décode ensuite l'énoncé complet. Si l'identification est
+    ambiguë, les meilleures candidates tournent chacune dans leur fil (le
+    code natif de Vosk libère le GIL) et la moins confiante est abandonnée
+    dès que possible.
+    """
+
+    def __init__(self, pools):
+        self.pools = pools
+        self.tracks = {lang: DecoderTrack(lang, pool.acquire()) for lang, pool in pools.items()}
+        self.closed = False
+        self.workers = {}
+        self.language_scores = {}
+        # Audio accumulé en attendant l'identification de la langue
+        self.probe = bytearray() if len(self.tracks) > 1 else None
+        self.probe_bytes = SAMPLE_RATE * LID_PROBE_MS // 1000 * 2
+
+    def live_tracks(self):
+        return [track for track in self.tracks.values() if not track.cancelled]
+
+    def identify(self, final=False):
+        """Choisit la ou les langues candidates à partir du début de l'énoncé
+
+        Avec `final`, l'énoncé tient entièrement dans l'échantillon: son
+        décodage sert directement de résultat.
+        """
+        audio_data = bytes(self.probe)
+        self.probe = None
+        tracks = list(self.tracks.values())
+        scores = list(_probe_executor.map(lambda track: track.probe(audio_data), tracks))
+        self.language_scores = {track.lang: score for track, score in zip(tracks, scores)}
+        
+        ranked = sorted(tracks, key=lambda track: self.language_scores[track.lang], reverse=True)
+        best = self.language_scores[ranked[0].lang]
+        if best > 0:
+            candidates = [track for track in ranked[:LID_MAX_CANDIDATES]
+                          if self.language_scores[track.lang] >= best * LID_AMBIGUOUS_RATIO]
+        else:
+            # Aucun mot reconnu: impossible de départager
+            candidates = ranked[:LID_MAX_CANDIDATES]
+        for track in tracks:
+            track.cancelled = track not in candidates
+        if final:
+            return
+        
+        # Reprendre l'énoncé depuis le début avec les seules candidates
+        for track in candidates:
+            track.restart()
+        if len(candidates) == 1:
+            candidates[0].feed(audio_data)
+            return
+        for track in candidates:
+            chunks = queue.Queue()
+            thread = threading.Thread(target=track.run, args=(chunks,), daemon=True)
+            thread.start()
+            self.workers[track.lang] = (chunks, thread)
+            chunks.put(audio_data)
+
+    def accept(self, chunk):
+        """Passe un bloc audio aux recognizers, retourne True si Vosk détecte une fin de phrase"""
+        if self.probe is not None:
+            self.probe += chunk
+            if len(self.probe) >= self.probe_bytes:
+                self.identify()
+        elif not self.workers:
+            self.live_tracks()[0].feed(chunk)
+        else:
+            # Les fils décodent plus tard: une vue sur un tampon réutilisé doit être copiée
+            chunk = bytes(chunk)
+            for track in self.live_tracks():
+                self.workers[track.lang][0].put(chunk)
+            self.prune()
+        endpoint = False
+        for track in self.live_tracks():
+            with track.lock:
+                endpoint = endpoint or track.endpoint
+                track.endpoint = False
+        return endpoint
+
+    def prune(self):
+        """Abandonne la langue perdante lorsque l'écart de confiance est net"""
+        live = self.live_tracks()
+        if len(live) < 2:
+            return
+        scores = {}
+        for track in live:
+            count, conf = track.scored_words()
+            if count < AUTO_MIN_WORDS:
+                return
+            scores[track.lang] = conf
+        best = max(scores.values())
+        for track in live:
+            if best - scores[track.lang] >= AUTO_CONF_MARGIN:
+                track.cancelled = True
+                self.workers[track.lang][0].put(None)
+
+    def partial(self):
+        """Retourne l'hypothèse partielle la plus confiante"""
+        best, best_conf = "", None
+        for track in self.live_tracks():
+            conf = track.scored_words()[1]
+            if best_conf is None or conf > best_conf:
+                best, best_conf = track.text(), conf
+        return best
+
+    def finish(self):
+        """Termine le décodage et retourne (langue, texte)"""
+        start = time.perf_counter()
+        if self.probe is not None:
+            # Énoncé plus court que l'échantillon d'identification
+            self.identify(final=True)
+            self.close()
+            best = max(self.live_tracks(), key=lambda track: utterance_confidence(track.segments))
+        elif not self.workers:
+            best = self.live_tracks()[0]
+            best.finish()
+            self.close()
+        else:
+            self.close()
+            
+            # Sélectionner la langue avec le score de confiance le plus élevé
+            best = max(self.live_tracks(), key=lambda track: utterance_confidence(track.segments))
+        finalize = time.perf_counter() - start
+        METRICS.observe("finalize", finalize)
+        
+        self.result = {
+            "lang": best.lang,
+            "text": best.text(),
+            "confidence": utterance_confidence(best.segments),
+            "words": best.words(),
+            "timings": {"decode_ms": round(best.decode_time * 1000, 2),
+                        "finalize_ms": round(finalize * 1000, 2)},
+        }
+        if self.language_scores:
+            self.result["language_scores"] = {lang: round(score, 4)
+                                              for lang, score in self.language_scores.items()}
+        return best.lang, self.result["text"]
+
+    def close(self):
+        """Arrête les fils de décodage et rend les recognizers à leur réserve"""
+        if self.closed:
+            return
+        self.closed = True
+        for chunks, _ in self.workers.values():
+            chunks.put(None)
+        for _, thread in self.workers.values():
+            thread.join()
+        for lang, track in self.tracks.items():
+            self.pools[lang].release(track.recognizer)
+
+def recognize_audio(pools, audio_data, block_size=BLOCK_SIZE):
+    """Reconnaît un tampon PCM 16 bits bloc par bloc, retourne le résultat détaillé"""
+    decoder = UtteranceDecoder(pools)
+    step = block_size * 2
+    try:
+        for offset in range(0, len(audio_data), step):
+            decoder.accept(audio_data[offset:offset + step])
+        decoder.finish()
+    finally:
+        # Rendre les recognizers même en cas d'erreur, sinon la réserve reste occupée
+        decoder.close()
+    return decoder.result
+
+class CommandGrammar:
+    """Phrases de commande par langue et intention correspondante
+
+    Chaque langue reçoit une grammaire Vosk (les phrases plus "[unk]" pour
+    absorber tout le reste) qui restreint la recherche aux commandes
+    connues: le décodage est plus rapide et plus fiable qu'en dictée.
+    """
+
+    def __init__(self, commands):
+        self.commands = commands  # intention -> {langue: [phrases]}
+        self.intents = {}  # langue -> {phrase normalisée: intention}
+        for intent, phrases in commands.items():
+            for lang, variants in phrases.items():
+                for phrase in variants:
+                    self.intents.setdefault(lang, {})[self.normalize(phrase)] = intent
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.lower().split())
+
+    @classmethod
+    def load(cls, path):
+        """Lit les commandes d'un fichier JSON au format de DEFAULT_COMMANDS"""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def grammar(self, lang):
+        """Grammaire Vosk de la langue (liste JSON de phrases)"""
+        return json.dumps(sorted(self.intents.get(lang, {})) + ["[unk]"], ensure_ascii=False)
+
+    def match(self, lang, text):
+        """Retourne l'intention d'un texte reconnu, ou None"""
+        return self.intents.get(lang, {}).get(self.normalize(text))
+
+def frame_rms(chunk, frame_len):
+    """Calcule le niveau RMS (échelle int16) de chaque trame d'un bloc PCM"""
+    import numpy as np
+    samples = np.frombuffer(chunk, dtype=np.int16)
+    usable = len(samples) - len(samples) % frame_len
+    frames = samples[:usable].reshape(-1, frame_len).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+class LevelMeter:
+    """Niveaux RMS et crête récents, calculés dans le fil de capture"""
+
+    def __init__(self, bars=VISUALIZER_BARS, sample_rate=SAMPLE_RATE):
+        import numpy as np
+        self.frame_len = sample_rate * VAD_FRAME_MS // 1000
+        self.levels = np.zeros(bars, dtype=np.float32)
+        self.peak = 0.0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def update(self, chunk):
+        """Ajoute les niveaux d'un bloc capturé"""
+        import numpy as np
+        rms = frame_rms(chunk, self.frame_len) / 32768.0
+        peak = float(np.abs(np.frombuffer(chunk, dtype=np.int16)).max(initial=0)) / 32768.0
+        with self.lock:
+            if len(rms) >= len(self.levels):
+                self.levels = rms[-len(self.levels):]
+            else:
+                self.levels = np.concatenate((self.levels[len(rms):], rms))
+            self.peak = peak
+            self.version += 1
+
+    def snapshot(self):
+        """Retourne (version, niveaux, crête)"""
+        with self.lock:
+            return self.version, self.levels, self.peak
+
+class EnergyEndpointer:
+    """Découpe le flux audio en énoncés d'après l'énergie du signal"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.frame_len = sample_rate * VAD_FRAME_MS // 1000
+        self.noise_floor = float(VAD_MIN_RMS) / VAD_NOISE_RATIO
+        self.reset()
+
+    def reset(self):
+        """Revient à l'état de silence"""
+        self.in_speech = False
+        self.speech_ms = 0
+        self.silence_ms = 0
+
+    def update(self, chunk):
+        """Analyse un bloc, retourne "start", "end" ou None"""
+        event = None
+        threshold = max(VAD_MIN_RMS, self.noise_floor * VAD_NOISE_RATIO)
+        for level in frame_rms(chunk, self.frame_len):
+            if level >= threshold:
+                self.speech_ms += VAD_FRAME_MS
+                self.silence_ms = 0
+                if not self.in_speech and self.speech_ms >= VAD_MIN_SPEECH_MS:
+                    self.in_speech = True
+                    event = "start"
+            else:
+                self.silence_ms += VAD_FRAME_MS
+                if not self.in_speech:
+                    # Suivi du bruit de fond pendant les silences
+                    self.speech_ms = 0
+                    self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(level)
+                elif self.silence_ms >= VAD_SILENCE_MS:
+                    self.reset()
+                    return "end"
+        return event
+
+class AudioRingBuffer:
+    """Tampon circulaire préalloué de blocs PCM
+
+    Chaque bloc est copié une seule fois dans un bytearray préalloué puis lu
+    sous forme de memoryview, valide jusqu'à la lecture suivante. Quand le
+    tampon est plein, l'écriture attend (contre-pression) ou, pour une
+    source temps réel, le bloc est abandonné et compté.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY_BLOCKS, block_bytes=BLOCK_SIZE * 2):
+        self.capacity = capacity
+        self.block_bytes = block_bytes
+        self.data = bytearray(capacity * block_bytes)
+        self.view = memoryview(self.data)
+        self.lengths = [0] * capacity
+        self.stamps = [0.0] * capacity  # instant d'écriture de chaque bloc
+        self.wait = 0.0  # attente dans le tampon du dernier bloc lu
+        self.head = 0  # blocs écrits depuis le début
+        self.tail = 0  # blocs libérés par le lecteur
+        self.reading = False  # le bloc en tête de lecture est encore utilisé
+        self.closed = False
+        self.cond = threading.Condition()
+        self.stats = {"written": 0, "dropped": 0, "max_pending": 0}
+
+    @property
+    def exhausted(self):
+        """Vrai lorsque le tampon est fermé et entièrement lu"""
+        with self.cond:
+            return self.closed and self.head - self.tail <= int(self.reading)
+
+    def write(self, data, block=True):
+        """Copie des données dans le tampon, retourne False si elles ont été abandonnées"""
+        data = memoryview(data).cast("B")
+        for offset in range(0, len(data), self.block_bytes):
+            part = data[offset:offset + self.block_bytes]
+            with self.cond:
+                while self.head - self.tail >= self.capacity and not self.closed:
+                    if not block:
+                        self.stats["dropped"] += 1
+                        return False
+                    self.cond.wait()
+                if self.closed:
+                    return False
+                slot = self.head % self.capacity
+                start = slot * self.block_bytes
+                self.view[start:start + len(part)] = part
+                self.lengths[slot] = len(part)
+                self.stamps[slot] = time.perf_counter()
+                self.head += 1
+                self.stats["written"] += 1
+                self.stats["max_pending"] = max(self.stats["max_pending"], self.head - self.tail)
+                self.cond.notify_all()
+        return True
+
+    def read(self, timeout=None):
+        """Libère le bloc précédent et retourne une vue sur le suivant
+
+        Retourne None si aucun bloc n'est arrivé avant `timeout` ou si le
+        tampon est fermé et vide.
+        """
+        with self.cond:
+            self._release()
+            self.cond.wait_for(lambda: self.head > self.tail or self.closed, timeout)
+            if self.head == self.tail:
+                return None
+            slot = self.tail % self.capacity
+            self.reading = True
+            self.wait = time.perf_counter() - self.stamps[slot]
+            start = slot * self.block_bytes
+            return self.view[start:start + self.lengths[slot]]
+
+    def _release(self):
+        if self.reading:
+            self.reading = False
+            self.tail += 1
+            self.cond.notify_all()
+
+    def release(self):
+        with self.cond:
+            self._release()
+
+    def reset(self):
+        """Vide le tampon pour une nouvelle session"""
+        with self.cond:
+            self.reading = False
+            self.tail = self.head
+            self.closed = False
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class AudioSource:
+    """Source audio PCM 16 bits mono, itérable bloc par bloc
+
+    La production (callback du périphérique ou fil dédié) remplit un
+    AudioRingBuffer vidé au début de chaque session; l'itération en lit
+    les blocs sous forme de memoryview. Les sous-classes implémentent
+    `open` et `close`.
+    """
+
+    live = False  # source temps réel: les blocs en trop sont abandonnés
+
+    def __init__(self, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE,
+                 capacity=RING_CAPACITY_BLOCKS, meter=None):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.meter = meter
+        self.ring = AudioRingBuffer(capacity, block_size * 2)
+        self.running = False
+        self.error = None
+
+    def push(self, data):
+        """Ajoute des données capturées, retourne False si elles ont été abandonnées"""
+        if self.meter is not None:
+            self.meter.update(data)
+        return self.ring.write(data, block=not self.live)
+
+    def stop(self):
+        self.running = False
+        self.ring.close()
+
+    def stats(self):
+        return dict(self.ring.stats)
+
+    def open(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        self.ring.reset()
+        self.error = None
+        self.running = True
+        self.open()
+        try:
+            while True:
+                view = self.ring.read(timeout=0.5)
+                if view is None:
+                    if self.ring.exhausted:
+                        break
+                    continue
+                METRICS.observe("queue", self.ring.wait)
+                yield view
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.running = False
+            self.ring.release()
+            self.ring.close()
+            self.close()
+
+class ThreadedSource(AudioSource):
+    """Source produite par un fil dédié via `produce`"""
+
+    def __init__(self, realtime=False, **kwargs):
+        super().__init__(**kwargs)
+        self.realtime = realtime
+
+    def produce(self):
+        raise NotImplementedError
+
+    def emit(self, data):
+        """Pousse un bloc, au rythme réel si demandé"""
+        if self.realtime:
+            self._deadline += len(data) / 2 / self.sample_rate
+            delay = self._deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return self.push(data)
+
+    def open(self):
+        self._deadline = time.monotonic()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            self.produce()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ring.close()
+
+class MicrophoneSource(AudioSource):
+    """Flux du microphone, itérable bloc par bloc jusqu'à l'appel de stop()"""
+
+    live = True
+
+    def __init__(self, device=None, **kwargs):
+        super().__init__(**kwargs)
+        self.device = device
+        self.stream = None
+        self.device_overflows = 0
+
+    def _callback(self, indata, frames, time, status):
+        if status:
+            if status.input_overflow:
+                self.device_overflows += 1
+            print(status)
+        if self.running:
+            self.push(indata)
+
+    def stats(self):
+        return dict(self.ring.stats, device_overflows=self.device_overflows)
+
+    def open(self):
+        # Importé ici pour que le mode sans interface fonctionne sans carte son
+        import sounddevice as sd
+        
+        self.stream = sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.block_size,
+                                        device=self.device, dtype='int16', channels=1,
+                                        callback=self._callback)
+        self.stream.start()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+class SharedInputStream:
+    """Flux d'entrée multicanal d'un périphérique, partagé par les sources de ses canaux
+
+    Le flux est ouvert par la première source abonnée et fermé par la
+    dernière; chaque bloc capturé est séparé en canaux mono.
+    """
+
+    def __init__(self, device=None, channels=2, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE):
+        self.device = device
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.subscribers = {}  # canal -> source
+        self.stream = None
+        self.device_overflows = 0
+        self.lock = threading.Lock()
+
+    def _callback(self, indata, frames, time, status):
+        import numpy as np
+        if status:
+            if status.input_overflow:
+                self.device_overflows += 1
+            print(status)
+        samples = np.frombuffer(indata, dtype=np.int16).reshape(-1, self.channels)
+        for channel, source in list(self.subscribers.items()):
+            if source.running:
+                source.push(np.ascontiguousarray(samples[:, channel]))
+
+    def subscribe(self, channel, source):
+        import sounddevice as sd
+        
+        with self.lock:
+            self.subscribers[channel] = source
+            if self.stream is None:
+                self.stream = sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.block_size,
+                                                device=self.device, dtype='int16',
+                                                channels=self.channels, callback=self._callback)
+                self.stream.start()
+
+    def unsubscribe(self, channel):
+        with self.lock:
+            self.subscribers.pop(channel, None)
+            if not self.subscribers and self.stream is not None:
+                self.stream.stop()
+                self.stream.close()
+                self.stream = None
+
+class ChannelSource(MicrophoneSource):
+    """Un canal d'un périphérique multicanal, traité comme un microphone mono"""
+
+    def __init__(self, shared, channel, **kwargs):
+        super().__init__(device=shared.device, **kwargs)
+        self.shared = shared
+        self.channel = channel
+
+    def stats(self):
+        return dict(self.ring.stats, device_overflows=self.shared.device_overflows)
+
+    def open(self):
+        self.shared.subscribe(self.channel, self)
+
+    def close(self):
+        self.shared.unsubscribe(self.channel)
+
+class WavFileSource(ThreadedSource):
+    """Lecture d'un fichier WAV (ou PCM brut), éventuellement au rythme réel"""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def produce(self):
+        if self.path.lower().endswith(".wav"):
+            with wave.open(self.path, "rb") as wf:
+                if (wf.getsampwidth(), wf.getnchannels(), wf.getframerate()) == (2, 1, self.sample_rate):
+                    # Format natif: lecture en flux sans tout charger
+                    while self.running:
+                        frames = wf.readframes(self.block_size)
+                        if not frames:
+                            return
+                        self.emit(frames)
+                    return
+        
+        # Autres formats: conversion complète puis découpage
+        audio = memoryview(read_audio(self.path, self.sample_rate))
+        step = self.block_size * 2
+        for offset in range(0, len(audio), step):
+            if not self.running:
+                return
+            self.emit(audio[offset:offset + step])
+
+class StdinSource(ThreadedSource):
+    """PCM 16 bits mono brut lu sur l'entrée standard (tube)"""
+
+    def produce(self):
+        stream = sys.stdin.buffer
+        while self.running:
+            data = stream.read(self.block_size * 2)
+            if not data:
+                return
+            self.emit(data)
+
+class SyntheticSource(ThreadedSource):
+    """Signal généré alternant silence et pseudo-parole, pour tests et mesures
+
+    `pattern` est une suite de (durée en secondes, parole) répétée jusqu'à
+    `duration`. La pseudo-parole est une voyelle synthétique modulée,
+    nettement au-dessus du seuil de l'endpointer.
+    """
+
+    def __init__(self, duration=10.0, pattern=((1.0, False), (2.0, True)), seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.duration = duration
+        self.pattern = pattern
+        self.seed = seed
+
+    def generate(self):
+        """Produit tout le signal (int16)"""
+        import numpy as np
+        rng = np.random.default_rng(self.seed)
+        total = int(self.duration * self.sample_rate)
+        segments = []
+        produced = 0
+        for seconds, speech in itertools.cycle(self.pattern):
+            if produced >= total:
+                break
+            count = min(int(seconds * self.sample_rate), total - produced)
+            t = np.arange(count) / self.sample_rate
+            noise = rng.normal(0, 60, count)
+            if speech:
+                envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+                voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((140, 280, 700, 1200), 1))
+                noise += 4000 * envelope * voice
+            segments.append(noise)
+            produced += count
+        return np.clip(np.concatenate(segments), -32768, 32767).astype(np.int16)
+
+    def produce(self):
+        audio = memoryview(self.generate().tobytes())
+        step = self.block_size * 2
+        for offset in range(0, len(audio), step):
+            if not self.running:
+                return
+            self.emit(audio[offset:offset + step])
+
+class TTSWorker:
+    """Fil unique de synthèse vocale avec file d'attente et cache audio
+
+    pyttsx3 n'étant pas sûr entre fils, le moteur est créé et utilisé
+    uniquement dans ce fil. Chaque texte est rendu une fois avec
+    `save_to_file` puis gardé en mémoire par (langue, texte) pour être
+    rejoué immédiatement. `interrupt` coupe la lecture en cours et périme
+    tout ce qui attend encore dans la file.
+    """
+
+    def __init__(self, rate=150, volume=0.9, cache_size=TTS_CACHE_SIZE):
+        self.rate = rate
+        self.volume = volume
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (langue, texte) -> (fréquence, échantillons)
+        self.voices = {}  # langue -> id de voix
+        self.requests = queue.Queue()
+        self.generation = 0
+        self.playing = False
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self):
+        return self.playing or not self.requests.empty()
+
+    def say(self, text, lang, interrupt=False):
+        """Met un texte en file, retourne un Future terminé après la lecture"""
+        if interrupt:
+            self.interrupt()
+        return self._enqueue(text, lang, play=True)
+
+    def prepare(self, text, lang):
+        """Rend un texte en cache sans le lire, retourne un Future"""
+        return self._enqueue(text, lang, play=False)
+
+    def _enqueue(self, text, lang, play):
+        future = concurrent.futures.Future()
+        with self.lock:
+            generation = self.generation
+        self.requests.put((generation, time.monotonic(), lang, text, future, play))
+        return future
+
+    def interrupt(self):
+        """Coupe la lecture en cours et abandonne les textes en attente"""
+        with self.lock:
+            self.generation += 1
+        if self.playing:
+            try:
+                import sounddevice as sd
+                sd.stop()
+            except Exception:
+                pass
+
+    def close(self):
+        self.interrupt()
+        self.requests.put(None)
+
+    def _is_stale(self, generation, queued_at):
+        with self.lock:
+            current = self.generation
+        return generation != current or time.monotonic() - queued_at > TTS_STALE_AFTER
+
+    def _run(self):
+        try:
+            import pyttsx3
+            self.engine = pyttsx3.init()
+            self.engine.setProperty('rate', self.rate)
+            self.engine.setProperty('volume', self.volume)
+        except Exception as e:
+            print(f"Could not start text-to-speech: {e}")
+            for item in iter(self.requests.get, None):
+                item[4].set_exception(e)
+            return
+        
+        for item in iter(self.requests.get, None):
+            generation, queued_at, lang, text, future, play = item
+            METRICS.observe("tts_wait", time.monotonic() - queued_at)
+            if play and self._is_stale(generation, queued_at):
+                future.set_result(False)
+                continue
+            if not play:
+                try:
+                    future.set_result(self.render(lang, text) is not None)
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+            self.playing = True
+            try:
+                start = time.perf_counter()
+                audio = self.render(lang, text)
+                METRICS.observe("tts_render", time.perf_counter() - start)
+                if self._is_stale(generation, queued_at):
+                    future.set_result(False)
+                    continue
+                start = time.perf_counter()
+                if audio is None or not self._play(audio):
+                    # Rendu ou lecture impossible: synthèse directe
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+                METRICS.observe("tts_play", time.perf_counter() - start)
+                future.set_result(True)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.playing = False
+
+    def voice_id(self, lang):
+        """Retourne l'id de voix de la langue, recherché une seule fois"""
+        if lang not in self.voices:
+            self.voices[lang] = None
+            for voice in self.engine.getProperty('voices'):
+                voice_name = voice.name.lower()
+                if (lang == "fr" and ("french" in voice_name or "français" in voice_name)) or \
+                   (lang == "en" and "english" in voice_name and "french" not in voice_name):
+                    self.voices[lang] = voice.id
+                    break
+        return self.voices[lang]
+
+    def render(self, lang, text):
+        """Rend un texte en audio via save_to_file, avec cache par (langue, texte)"""
+        import numpy as np
+        key = (lang, text)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        
+        voice = self.voice_id(lang)
+        if voice is not None:
+            self.engine.setProperty('voice', voice)
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with wave.open(path, "rb") as wf:
+                if wf.getsampwidth() != 2:
+                    return None
+                rate = wf.getframerate()
+                samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+                samples = samples.reshape(-1, wf.getnchannels())
+        except (wave.Error, EOFError):
+            # Certains pilotes (nsss) ne produisent pas de WAV
+            return None
+        finally:
+            os.remove(path)
+        
+        self.cache[key] = (rate, samples)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return self.cache[key]
+
+    def _play(self, audio):
+        try:
+            import sounddevice as sd
+            rate, samples = audio
+            sd.play(samples, rate)
+            sd.wait()
+            return True
+        except Exception as e:
+            print(f"Could not play synthesized audio: {e}")
+            return False
+
+class UtteranceAudioRing:
+    """Audio brut des derniers énoncés et leurs résultats par langue
+
+    Borné en nombre d'énoncés et en durée totale; le plus ancien est oublié
+    en premier. Permet de redécoder un énoncé dans une autre langue sans
+    le faire répéter.
+    """
+
+    def __init__(self, capacity=UTTERANCE_RING_SIZE, max_seconds=UTTERANCE_RING_SECONDS):
+        self.capacity = capacity
+        self.max_bytes = max_seconds * SAMPLE_RATE * 2
+        self.entries = OrderedDict()  # id -> (audio, {langue: résultat})
+        self.size = 0
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def add(self, audio_data, result):
+        """Retient l'audio d'un énoncé et son premier résultat, retourne son id"""
+        audio_data = bytes(audio_data)
+        with self.lock:
+            audio_id = next(self.ids)
+            self.entries[audio_id] = (audio_data, {result["lang"]: result})
+            self.size += len(audio_data)
+            while self.entries and (len(self.entries) > self.capacity or self.size > self.max_bytes):
+                old_audio, _ = self.entries.popitem(last=False)[1]
+                self.size -= len(old_audio)
+            return audio_id
+
+    def audio(self, audio_id):
+        with self.lock:
+            entry = self.entries.get(audio_id)
+            return entry[0] if entry is not None else None
+
+    def result(self, audio_id, lang):
+        with self.lock:
+            entry = self.entries.get(audio_id)
+            return entry[1].get(lang) if entry is not None else None
+
+    def store(self, audio_id, lang, result):
+        with self.lock:
+            entry = self.entries.get(audio_id)
+            if entry is not None:
+                entry[1][lang] = result
+
+class SpeechEngine:
+    """Moteur de reconnaissance et de synthèse vocale, indépendant de l'interface
+
+    `listen` décode une source audio (itérable synchrone ou asynchrone de
+    blocs PCM 16 bits mono) et produit des événements "partial" et "final";
+    `speak` prononce un texte. Chaque flux est décodé dans son propre fil,
+    ce qui permet de suivre plusieurs flux dans une même boucle asyncio.
+    """
+
+    def __init__(self, models=None, tts=True, on_load=None, commands=None):
+        self.models = models or ModelRegistry(on_load=on_load)
+        self.tts = TTSWorker() if tts else None
+        self.set_commands(commands or DEFAULT_COMMANDS)
+        self.recent = UtteranceAudioRing()
+        # Redécodages demandés et décodages d'avance ont chacun leur fil:
+        # une demande n'attend jamais derrière un décodage d'avance
+        self.redecoder = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="redecode")
+        self.prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.prefetch_target = None  # énoncé dont les décodages d'avance sont encore utiles
+        self.prefetches = []
+
+    @property
+    def is_speaking(self):
+        return self.tts is not None and self.tts.busy
+
+    def required_languages(self, lang):
+        """Langues dont le modèle est nécessaire pour reconnaître dans la langue demandée"""
+        return self.models.languages() if lang == "auto" else [lang]
+
+    def pools_for(self, lang, commands=False):
+        """Retourne les réserves de recognizers à utiliser pour la langue demandée"""
+        if commands:
+            return {code: self.command_pool(code) for code in self.required_languages(lang)}
+        return {code: self.models.pool(code) for code in self.required_languages(lang)}
+
+    def set_commands(self, commands):
+        """Remplace les phrases du mode commande sans recharger les modèles
+
+        Les énoncés en cours finissent avec l'ancienne grammaire; les
+        suivants empruntent des recognizers créés avec la nouvelle.
+        """
+        self.commands = commands if isinstance(commands, CommandGrammar) else CommandGrammar(commands)
+
+    def command_pool(self, lang):
+        """Réserve de recognizers de la langue limités à la grammaire de commandes"""
+        return self.models.grammar_pool(lang, self.commands.grammar(lang))
+
+    def match_command(self, result):
+        """Intention d'un résultat du mode commande, si la confiance suffit"""
+        if result["confidence"] < COMMAND_MIN_CONFIDENCE:
+            return None
+        return self.commands.match(result["lang"], result["text"])
+
+    def is_ready(self, lang):
+        return all(self.models.is_loaded(code) for code in self.required_languages(lang))
+
+    def recognize(self, audio_data, lang, commands=False):
+        """Reconnaît un tampon audio complet (fenêtre fixe)"""
+        result = recognize_audio(self.pools_for(lang, commands), audio_data)
+        if commands:
+            result["intent"] = self.match_command(result)
+        return result
+
+    def recognize_stream(self, chunks, lang, continuous=True, max_blocks=None, streaming=True,
+                         commands=False, retain=False):
+        """Décode un flux de blocs PCM et produit les événements de reconnaissance
+
+        En mode continu, le flux est découpé en énoncés par l'endpointer et
+        par la détection de fin de phrase de Vosk. Sinon, tout le flux (ou
+        ses `max_blocks` premiers blocs) forme un seul énoncé. En mode
+        commande, le décodage est limité aux phrases de commande et chaque
+        événement "final" porte l'intention reconnue ("intent"). Avec
+        `retain`, l'audio de chaque énoncé est gardé dans `recent` et
+        l'événement "final" porte son identifiant ("audio_id").
+        """
+        pools = self.pools_for(lang, commands)
+        if continuous:
+            events = self._recognize_continuous(chunks, pools, retain)
+        else:
+            events = self._recognize_window(chunks, pools, max_blocks, streaming, retain)
+        try:
+            for event in events:
+                if commands and event["type"] == "final":
+                    event["intent"] = self.match_command(event)
+                yield event
+        finally:
+            events.close()
+
+    def _recognize_continuous(self, chunks, pools, retain=False):
+        endpointer = EnergyEndpointer()
+        decoder = None
+        audio = None  # audio de l'énoncé en cours, s'il est retenu
+        preroll = None
+        last_partial = ""
+        position = 0  # échantillons lus depuis le début du flux
+        start = 0  # début de l'énoncé en cours
+        try:
+            for chunk in chunks:
+                offset = position
+                position += len(chunk) // 2
+                # Ignorer notre propre synthèse vocale
+                if self.is_speaking:
+                    endpointer.reset()
+                    if decoder is not None:
+                        decoder.close()
+                    decoder = None
+                    preroll = None
+                    continue
+                
+                event = endpointer.update(chunk)
+                if decoder is None:
+                    if event != "start":
+                        preroll = bytes(chunk)
+                        continue
+                    decoder = UtteranceDecoder(pools)
+                    audio = bytearray() if retain else None
+                    start = offset
+                    if preroll is not None:
+                        decoder.accept(preroll)
+                        if audio is not None:
+                            audio += preroll
+                        start -= len(preroll) // 2
+                        preroll = None
+                
+                vosk_endpoint = decoder.accept(chunk)
+                if audio is not None:
+                    audio += chunk
+                partial = decoder.partial()
+                if partial != last_partial:
+                    last_partial = partial
+                    yield {"type": "partial", "text": partial}
+                if event == "end" or vosk_endpoint:
+                    decoder.finish()
+                    yield self._final_event(decoder.result, start, position, audio)
+                    endpointer.reset()
+                    decoder = None
+                    last_partial = ""
+            
+            # Terminer l'énoncé en cours à la fin du flux
+            if decoder is not None:
+                decoder.finish()
+                yield self._final_event(decoder.result, start, position, audio)
+                decoder = None
+        finally:
+            if decoder is not None:
+                decoder.close()
+
+    def _recognize_window(self, chunks, pools, max_blocks, streaming, retain=False):
+        decoder = UtteranceDecoder(pools) if streaming else None
+        received = []
+        count = 0
+        position = 0
+        last_partial = ""
+        try:
+            for chunk in chunks:
+                count += 1
+                position += len(chunk) // 2
+                if decoder is None or retain:
+                    received.append(bytes(chunk))
+                if decoder is not None:
+                    # Décodage immédiat du bloc et texte partiel
+                    decoder.accept(chunk)
+                    partial = decoder.partial()
+                    if partial != last_partial:
+                        last_partial = partial
+                        yield {"type": "partial", "text": partial}
+                if max_blocks and count >= max_blocks:
+                    break
+            if not count:
+                return
+            if decoder is not None:
+                decoder.finish()
+                result = decoder.result
+            else:
+                result = recognize_audio(pools, b"".join(received))
+            yield self._final_event(result, 0, position, b"".join(received) if retain else None)
+        finally:
+            if decoder is not None:
+                decoder.close()
+
+    def _final_event(self, result, start, end, audio_data=None):
+        """Événement final avec la position de l'énoncé dans le flux (secondes)"""
+        event = {"type": "final", **result,
+                 "start": round(start / SAMPLE_RATE, 3), "end": round(end / SAMPLE_RATE, 3)}
+        if audio_data is not None:
+            event["audio_id"] = self.recent.add(audio_data, result)
+        return event
+
+    def is_decoding(self):
+        return self.models.busy()
+
+    def redecode(self, audio_id, lang):
+        """Redécode un énoncé retenu dans une autre langue, retourne un Future
+
+        Le résultat est gardé avec l'énoncé: s'il a déjà été calculé (par
+        exemple d'avance par `prefetch`), le Future est déjà terminé. Il
+        vaut None si l'énoncé a été oublié entre-temps.
+        """
+        cached = self.recent.result(audio_id, lang)
+        if cached is not None:
+            future = concurrent.futures.Future()
+            future.set_result(cached)
+            return future
+        return self.redecoder.submit(self._redecode, audio_id, lang, False)
+
+    def prefetch(self, audio_id, langs):
+        """Décode d'avance un énoncé retenu dans d'autres langues, lorsque le moteur est inactif
+
+        Seul le dernier énoncé est décodé d'avance: les décodages encore en
+        attente pour les énoncés précédents sont abandonnés.
+        """
+        self.prefetch_target = audio_id
+        for future in self.prefetches:
+            future.cancel()
+        self.prefetches = [self.prefetcher.submit(self._redecode, audio_id, lang, True) for lang in langs]
+
+    def _redecode(self, audio_id, lang, idle):
+        if idle:
+            # Laisser la priorité aux énoncés en cours de décodage
+            while self.is_decoding():
+                if audio_id != self.prefetch_target:
+                    return None
+                time.sleep(REDECODE_IDLE_POLL)
+            if audio_id != self.prefetch_target:
+                return None
+        cached = self.recent.result(audio_id, lang)
+        if cached is not None:
+            return cached
+        audio_data = self.recent.audio(audio_id)
+        if audio_data is None:
+            return None
+        result = self.recognize(audio_data, lang)
+        self.recent.store(audio_id, lang, result)
+        return result
+
+    async def listen(self, source, lang, continuous=True, max_blocks=None, streaming=True,
+                     commands=False, retain=False):
+        """Itère de façon asynchrone sur les événements de reconnaissance d'une source"""
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        stop = threading.Event()
+        pump = None
+        
+        if hasattr(source, "__aiter__"):
+            # Source asynchrone: ses blocs sont relayés au fil de décodage.
+            # Le nombre de blocs en attente est borné pour que la source soit
+            # ralentie (contre-pression) si le décodage prend du retard.
+            chunks = queue.Queue()
+            credits = asyncio.Semaphore(LISTEN_MAX_PENDING_BLOCKS)
+            
+            async def pump_source(blocks):
+                try:
+                    async for chunk in blocks:
+                        await credits.acquire()
+                        chunks.put(chunk)
+                except ConnectionError:
+                    pass
+                finally:
+                    chunks.put(None)
+            
+            def take_chunks():
+                for chunk in iter(chunks.get, None):
+                    loop.call_soon_threadsafe(credits.release)
+                    yield chunk
+            
+            pump = asyncio.ensure_future(pump_source(source))
+            source = take_chunks()
+        
+        def produce():
+            blocks = iter(source)
+            try:
+                running = itertools.takewhile(lambda _: not stop.is_set(), blocks)
+                for event in self.recognize_stream(running, lang, continuous, max_blocks, streaming,
+                                                   commands, retain):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, e)
+            finally:
+                close = getattr(blocks, "close", None)
+                if close is not None:
+                    close()
+                loop.call_soon_threadsafe(events.put_nowait, None)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            stop.set()
+            if pump is not None:
+                pump.cancel()
+
+    def say(self, text, lang, interrupt=False):
+        """Met un texte en file de synthèse, retourne un Future"""
+        if self.tts is None:
+            raise RuntimeError("Text-to-speech is disabled for this engine")
+        return self.tts.say(text, lang, interrupt)
+
+    def stop_speaking(self):
+        if self.tts is not None:
+            self.tts.interrupt()
+
+    def speak_sync(self, text, lang, interrupt=False):
+        """Prononce un texte dans la langue donnée (bloquant)"""
+        return self.say(text, lang, interrupt).result()
+
+    async def speak(self, text, lang, interrupt=False):
+        """Prononce un texte sans bloquer la boucle asyncio"""
+        return await asyncio.wrap_future(self.say(text, lang, interrupt))
+
+def user_data_dir():
+    """Dossier de données persistantes de l'application"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_DATA_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class HistoryStore:
+    """Historique des transcriptions persisté dans SQLite, avec recherche plein texte
+
+    La recherche utilise FTS5 lorsque le module sqlite3 le fournit, et se
+    rabat sur LIKE sinon.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                              "id INTEGER PRIMARY KEY, created REAL NOT NULL, "
+                              "lang TEXT NOT NULL, text TEXT NOT NULL)")
+        try:
+            with self.conn:
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5("
+                                  "text, content='entries', content_rowid='id')")
+                self.conn.execute("CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN "
+                                  "INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text); END")
+                self.conn.execute("CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN "
+                                  "INSERT INTO entries_fts(entries_fts, rowid, text) "
+                                  "VALUES ('delete', old.id, old.text); END")
+                self.conn.execute("CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN "
+                                  "INSERT INTO entries_fts(entries_fts, rowid, text) "
+                                  "VALUES ('delete', old.id, old.text); "
+                                  "INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text); END")
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def add(self, lang, text, created=None):
+        with self.lock, self.conn:
+            cursor = self.conn.execute("INSERT INTO entries (created, lang, text) VALUES (?, ?, ?)",
+                                       (created or time.time(), lang, text))
+            return cursor.lastrowid
+
+    def update(self, entry_id, lang, text):
+        """Remplace la langue et le texte d'une entrée (redécodage)"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE entries SET lang = ?, text = ? WHERE id = ?", (lang, text, entry_id))
+
+    def _where(self, query):
+        if not query:
+            return "", ()
+        if self.fts:
+            # Chaque mot est cherché comme préfixe, tous doivent être présents
+            terms = " ".join('"{}"*'.format(word.replace('"', '""')) for word in query.split())
+            return " WHERE id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)", (terms,)
+        return " WHERE text LIKE ?", (f"%{query}%",)
+
+    def count(self, query=None):
+        where, params = self._where(query)
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries" + where, params).fetchone()[0]
+
+    def page(self, offset, limit, query=None):
+        """Retourne les entrées (id, date, langue, texte) de la page, de la plus ancienne à la plus récente"""
+        where, params = self._where(query)
+        with self.lock:
+            return self.conn.execute("SELECT id, created, lang, text FROM entries" + where +
+                                     " ORDER BY id LIMIT ? OFFSET ?", params + (limit, offset)).fetchall()
+
+    def last(self):
+        with self.lock:
+            return self.conn.execute("SELECT id, created, lang, text FROM entries "
+                                     "ORDER BY id DESC LIMIT 1").fetchone()
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+
+class HistoryView(ctk.CTkFrame):
+    """Liste d'historique virtualisée
+
+    Seules les lignes visibles existent en tant que widgets; elles sont
+    réutilisées en défilant et leurs données sont lues page par page
+    dans le HistoryStore.
+    """
+
+    ROW_HEIGHT = 52
+
+    def __init__(self, master, store, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.on_select = on_select
+        self.query = ""
+        self.total = 0
+        self.first = 0
+        self.pages = OrderedDict()  # numéro de page -> entrées
+        self.rows = []
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=(5, 0))
+        ctk.CTkLabel(header, text="Historique").pack(side="left", padx=5)
+        self.search_entry = ctk.CTkEntry(header, placeholder_text="Rechercher...", width=200)
+        self.search_entry.pack(side="right", padx=5)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.search(self.search_entry.get()))
+        
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.body.bind("<Configure>", lambda event: self._resize(event.height))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", pady=5)
+        self._bind_wheel(self.body)
+        
+        self.refresh(scroll_to_end=True)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+    def _resize(self, height):
+        """Crée ou détruit des lignes pour remplir exactement la hauteur visible"""
+        visible = max(1, height // self.ROW_HEIGHT)
+        while len(self.rows) < visible:
+            row = ctk.CTkFrame(self.body, height=self.ROW_HEIGHT - 4)
+            row.pack(fill="x", pady=2)
+            row.pack_propagate(False)
+            meta = ctk.CTkLabel(row, text="", font=ctk.CTkFont(size=10), anchor="w", height=14)
+            meta.pack(fill="x", padx=10, pady=(2, 0))
+            text = ctk.CTkLabel(row, text="", anchor="w", justify="left", height=20)
+            text.pack(fill="x", padx=10)
+            for widget in (row, meta, text):
+                self._bind_wheel(widget)
+                widget.bind("<Button-1>", lambda event, index=len(self.rows): self._select(index))
+            self.rows.append((row, meta, text))
+        while len(self.rows) > visible:
+            self.rows.pop()[0].destroy()
+        self.first = max(0, min(self.first, self.total - len(self.rows)))
+        self.render()
+
+    def entry(self, index):
+        """Retourne l'entrée d'indice donné en chargeant sa page si nécessaire"""
+        page = index // HISTORY_PAGE_SIZE
+        if page not in self.pages:
+            self.pages[page] = self.store.page(page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE, self.query)
+            if len(self.pages) > HISTORY_CACHED_PAGES:
+                self.pages.popitem(last=False)
+        self.pages.move_to_end(page)
+        entries = self.pages[page]
+        offset = index % HISTORY_PAGE_SIZE
+        return entries[offset] if offset < len(entries) else None
+
+    def render(self):
+        for i, (row, meta, text) in enumerate(self.rows):
+            entry = self.entry(self.first + i) if self.first + i < self.total else None
+            if entry is None:
+                meta.configure(text="")
+                text.configure(text="")
+                row.configure(fg_color="transparent")
+                continue
+            _, created, lang, content = entry
+            flag = "🇫🇷" if lang == "fr" else "🇬🇧"
+            meta.configure(text=f"{datetime.fromtimestamp(created).strftime('%d/%m %H:%M:%S')}  {flag}")
+            text.configure(text=content if len(content) <= 90 else content[:89] + "…")
+            row.configure(fg_color=("gray86", "gray17"))
+        if self.total:
+            self.scrollbar.set(self.first / self.total,
+                               min(1.0, (self.first + len(self.rows)) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def refresh(self, scroll_to_end=False):
+        """Relit le nombre d'entrées et vide le cache de pages"""
+        self.total = self.store.count(self.query)
+        self.pages.clear()
+        if scroll_to_end:
+            self.first = max(0, self.total - len(self.rows))
+        self.first = max(0, min(self.first, self.total - len(self.rows)))
+        self.render()
+
+    def append(self):
+        """Prend en compte une nouvelle entrée ajoutée au store"""
+        at_end = self.first + len(self.rows) >= self.total
+        if self.query:
+            self.refresh(scroll_to_end=at_end)
+            return
+        self.total += 1
+        # Seule la dernière page peut avoir changé
+        self.pages.pop((self.total - 1) // HISTORY_PAGE_SIZE, None)
+        if at_end:
+            self.first = max(0, self.total - len(self.rows))
+        self.render()
+
+    def search(self, query):
+        query = query.strip()
+        if query != self.query:
+            self.query = query
+            self.refresh(scroll_to_end=True)
+
+    def scroll(self, rows):
+        first = max(0, min(self.first + rows, self.total - len(self.rows)))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.first = max(0, min(int(float(value) * self.total), self.total - len(self.rows)))
+            self.render()
+        elif action == "scroll":
+            step = len(self.rows) if unit == "pages" else 1
+            self.scroll(int(value) * step)
+
+    def _select(self, index):
+        entry = self.entry(self.first + index) if self.first + index < self.total else None
+        if entry is not None and self.on_select:
+            self.on_select(entry)
+
 class VoiceRecognitionApp:
-    def __init__(self, root):
+    def __init__(self, root, debug=False, metrics_file=None, metrics_port=None):
         self.root = root
         self.root.title("MultiLingual Voice Assistant")
         self.root.geometry("900x600")
@@ -49,108 +2085,80 @@ class VoiceRecognitionApp:
         # Variables d'état
         self.current_language = ctk.StringVar(value="fr")
         self.is_recording = False
-        self.audio_queue = queue.Queue()
-        self.history = []
+        self.source = None
+        self.level_meter = None
+        self.history = HistoryStore(os.path.join(user_data_dir(), HISTORY_DB_NAME))
+        
+        # Mode streaming: chaque bloc est décodé dès son arrivée
+        self.streaming = True
+        self._partial_lock = threading.Lock()
+        self._pending_partial = None
+        self._partial_scheduled = False
         
-        # Setup Vosk DLL directory for PyInstaller
-        self.setup_vosk_environment()
+        # Mode continu: le flux reste ouvert et l'audio est découpé en énoncés
+        self.continuous_mode = ctk.BooleanVar(value=False)
+        
+        # Dernier énoncé retenu: redécodé si l'on change de langue après coup
+        self.last_utterance = None  # {"audio_id", "entry_id", "lang"}
+        
+        # Mode commande: seules les phrases de commande sont reconnues
+        self.command_mode = ctk.BooleanVar(value=False)
+        self.commands_path = os.path.join(user_data_dir(), COMMANDS_FILE_NAME)
+        self._commands_mtime = None
+        
+        # Instrumentation: affichage des latences et export des métriques
+        self.debug = debug
+        self.metrics_file = metrics_file
+        self._last_timings = {}
         
         # Chargement des modèles (asynchrone pour ne pas bloquer l'interface)
         self.load_status = ctk.StringVar(value="Chargement des modèles...")
-        self.model_fr = None
-        self.model_en = None
+        self.speech = SpeechEngine(on_load=lambda lang: self.update_status(
+            f"Chargement du modèle {LANGUAGE_NAMES.get(lang, lang)}...", "#000000"))
+        self.models = self.speech.models
         threading.Thread(target=self.load_models, daemon=True).start()
         
-        # Configuration TTS
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 150)
-        self.engine.setProperty('volume', 0.9)
+        # Boucle asyncio dédiée aux flux du moteur de reconnaissance
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
         
         # Construction de l'interface
         self.setup_ui()
+        
+        if metrics_port:
+            self.run_async(serve_metrics(port=metrics_port))
     
-    def setup_vosk_environment(self):
-        """Special handling for Vosk DLLs in PyInstaller environment"""
-        if getattr(sys, 'frozen', False):
-            # Create temp directory for Vosk DLLs
-            temp_dir = tempfile.mkdtemp()
-            vosk_dir = os.path.join(temp_dir, 'vosk')
-            os.makedirs(vosk_dir, exist_ok=True)
-            
-            # Try to copy DLLs if they exist in MEIPASS
-            try:
-                dll_src = os.path.join(sys._MEIPASS, 'vosk', 'libvosk.dll')
-                dll_dst = os.path.join(vosk_dir, 'libvosk.dll')
-                if os.path.exists(dll_src):
-                    import shutil
-                    shutil.copy2(dll_src, dll_dst)
-            except Exception as e:
-                print(f"Could not copy Vosk DLL: {e}")
-            
-            # Add to DLL search path
-            os.add_dll_directory(vosk_dir)
-
     def load_models(self):
-        """Charge les modèles Vosk en arrière-plan"""
+        """Charge le modèle de la langue active puis les autres en arrière-plan"""
         try:
-            MODEL_FR_PATH = resource_path(os.path.join("models", "vosk-model-small-fr-0.22"))
-            MODEL_EN_PATH = resource_path(os.path.join("models", "vosk-model-small-en-us-0.15"))
-
-            if not os.path.exists(MODEL_FR_PATH):
-                raise FileNotFoundError(f"French model not found at: {MODEL_FR_PATH}")
-            if not os.path.exists(MODEL_EN_PATH):
-                raise FileNotFoundError(f"English model not found at: {MODEL_EN_PATH}")
-
-            self.update_status("Chargement du modèle français...", "#000000")
-            self.model_fr = Model(MODEL_FR_PATH)
-
-            self.update_status("Chargement du modèle anglais...", "#000000")
-            self.model_en = Model(MODEL_EN_PATH)
-
+            lang = self.current_language.get()
+            for code in self.speech.required_languages(lang):
+                self.models.get(code)
             self.update_status("Prêt à l'utilisation", "#4CAF50")
+            
+            # Préchargement des autres langues tant que le budget le permet
+            for code in self.models.languages():
+                if not self.models.is_loaded(code) and self.models.fits(code):
+                    self.models.get(code)
+                    self.update_status("Prêt à l'utilisation", "#4CAF50")
         except Exception as e:
             self.update_status(f"Erreur: {str(e)}", "#F44336")
             print(f"Error loading models: {e}")
+    
+    def run_async(self, coro):
+        """Planifie une coroutine sur la boucle du moteur"""
+        def _report(future):
+            if not future.cancelled() and future.exception() is not None:
+                print(f"Error: {future.exception()}")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(_report)
+        return future
             
     def update_status(self, message, color):
         """Thread-safe status updates"""
         self.root.after(0, lambda: self.load_status.set(message))
         self.root.after(0, lambda: self.status_label.configure(text_color=color))
 
-    def update_result(self, lang, text):
-        """Thread-safe result updates"""
-        def _update():
-            if not text:
-                self.result_label.configure(text="[Aucun texte reconnu]")
-                return
-                
-            self.result_label.configure(text=text)
-            
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            lang_display = "🇫🇷" if lang == "fr" else "🇬🇧"
-            
-            history_entry = ctk.CTkFrame(self.history_frame)
-            history_entry.pack(fill="x", padx=5, pady=2, ipadx=5, ipady=5)
-            
-            header_frame = ctk.CTkFrame(history_entry, fg_color="transparent")
-            header_frame.pack(fill="x", padx=5, pady=(5, 0))
-            
-            time_label = ctk.CTkLabel(header_frame, text=timestamp, font=ctk.CTkFont(size=10))
-            time_label.pack(side="left")
-            
-            lang_label = ctk.CTkLabel(header_frame, text=lang_display, font=ctk.CTkFont(size=12))
-            lang_label.pack(side="right")
-            
-            text_label = ctk.CTkLabel(history_entry, text=text, 
-                                    justify="left", anchor="w", 
-                                    wraplength=400)
-            text_label.pack(fill="x", padx=10, pady=5)
-            
-            self.history.append((lang, text))
-            self.replay_button.configure(state="normal")
-            self.history_frame._parent_canvas.yview_moveto(1.0)
-        
-        self.root.after(0, _update)
     def setup_ui(self):
         """Configure tous les éléments de l'interface"""
         # Utilisation d'un grid layout pour un meilleur contrôle
@@ -199,8 +2207,8 @@ class VoiceRecognitionApp:
         self.content_frame.grid_rowconfigure(1, weight=0)
         
         # Panneau d'historique avec défilement
-        self.history_frame = ctk.CTkScrollableFrame(self.content_frame, label_text="Historique")
-        self.history_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        self.history_view = HistoryView(self.content_frame, self.history, on_select=self.show_entry)
+        self.history_view.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
         
         # Zone de visualisation de texte reconnu
         self.result_frame = ctk.CTkFrame(self.content_frame)
@@ -216,9 +2224,10 @@ class VoiceRecognitionApp:
         self.control_frame = ctk.CTkFrame(self.main_frame)
         self.control_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=(5, 10))
         
-        # Visualiseur d'onde audio (simulé)
+        # Visualiseur des niveaux réels du microphone
         self.visualizer_canvas = ctk.CTkCanvas(self.control_frame, height=40)
         self.visualizer_canvas.pack(fill="x", padx=10, pady=5)
+        self.setup_visualizer()
         self.draw_idle_wave()
         
         # Boutons de contrôle
@@ -240,9 +2249,17 @@ class VoiceRecognitionApp:
                                         command=self.clear_history)
         self.clear_button.pack(side="right", padx=10, pady=10)
         
+        self.continuous_switch = ctk.CTkSwitch(self.button_frame, text="Mode continu",
+                                               variable=self.continuous_mode)
+        self.continuous_switch.pack(side="left", padx=10, pady=10)
+        
+        self.command_switch = ctk.CTkSwitch(self.button_frame, text="Mode commande",
+                                            variable=self.command_mode)
+        self.command_switch.pack(side="left", padx=10, pady=10)
+        
         self.replay_button = ctk.CTkButton(self.button_frame, text="Relire dernier texte",
                                          width=150,
-                                         state="disabled",
+                                         state="normal" if self.history.last() else "disabled",
                                          command=self.replay_last)
         self.replay_button.pack(side="right", padx=10, pady=10)
         
@@ -254,50 +2271,76 @@ class VoiceRecognitionApp:
                                        anchor="w", font=ctk.CTkFont(size=12))
         self.status_label.pack(side="left", padx=10, pady=5)
         
+        # Latences du dernier énoncé (mode debug)
+        self.debug_label = ctk.CTkLabel(self.status_frame, text="", anchor="e",
+                                        font=ctk.CTkFont(size=11), text_color="#6B7280")
+        if self.debug:
+            self.debug_label.pack(side="right", padx=10, pady=5)
+        
         # Démarrer l'effet de pulsation du bouton
         self.pulse_animation()
         
+    def setup_visualizer(self):
+        """Crée une fois pour toutes les éléments du visualiseur"""
+        canvas = self.visualizer_canvas
+        self.wave_baseline = canvas.create_line(0, 0, 0, 0, fill="#6B7280", width=1, dash=(4, 2))
+        self.wave_shape = canvas.create_polygon(0, 0, 0, 0, 0, 0, fill="#9CA3AF",
+                                                outline="#9CA3AF", smooth=True)
+        self.wave_peak = canvas.create_line(0, 0, 0, 0, fill="#10B981", width=3)
+        self._wave_color = "#9CA3AF"
+        self._wave_version = None
+        # Forme affichée au repos
+        self._idle_levels = [10 ** ((VISUALIZER_FLOOR_DB + 8) / 20) *
+                             (1.5 + math.sin(12 * math.pi * i / (VISUALIZER_BARS - 1)))
+                             for i in range(VISUALIZER_BARS)]
+        
+        # Redessiner l'onde de repos lorsque le canevas change de taille
+        canvas.bind("<Configure>", lambda event: None if self.is_recording else self.draw_idle_wave())
+    
+    def draw_levels(self, levels, peak, color):
+        """Met à jour les éléments du visualiseur sans les recréer"""
+        canvas = self.visualizer_canvas
+        width = canvas.winfo_width() or 800
+        height = canvas.winfo_height() or 40
+        middle = height / 2
+        
+        # Échelle logarithmique: VISUALIZER_FLOOR_DB -> 0, 0 dBFS -> pleine hauteur
+        # (calcul en Python pur: numpy n'est pas chargé au démarrage de l'interface)
+        step = (width - 8) / max(len(levels) - 1, 1)
+        points = [(i * step, min(max(1 - 20 * math.log10(max(float(level), 1e-6)) / VISUALIZER_FLOOR_DB, 0), 1)
+                   * (middle - 2) + 1) for i, level in enumerate(levels)]
+        top = [coord for x, amplitude in points for coord in (x, middle - amplitude)]
+        bottom = [coord for x, amplitude in reversed(points) for coord in (x, middle + amplitude)]
+        canvas.coords(self.wave_shape, *top, *bottom)
+        canvas.coords(self.wave_baseline, 0, middle, width, middle)
+        if color != self._wave_color:
+            canvas.itemconfigure(self.wave_shape, fill=color, outline=color)
+            self._wave_color = color
+        
+        # Indicateur de crête, rouge en cas de saturation
+        peak_height = min(peak, 1.0) * (middle - 1)
+        canvas.coords(self.wave_peak, width - 3, middle - peak_height, width - 3, middle + peak_height)
+        canvas.itemconfigure(self.wave_peak, fill="#EF4444" if peak >= 0.99 else "#10B981")
+    
     def draw_idle_wave(self):
-        """Dessine une onde audio statique pour l'état d'inactivité"""
-        self.visualizer_canvas.delete("all")
-        width = self.visualizer_canvas.winfo_width() or 800
-        height = self.visualizer_canvas.winfo_height() or 40
-        
-        # Ligne médiane
-        self.visualizer_canvas.create_line(0, height/2, width, height/2, 
-                                         fill="#6B7280", width=1, dash=(4, 2))
-        
-        # Petites ondes statiques
-        for i in range(0, width, 20):
-            y = height/2 + (5 * (1 if i % 40 == 0 else -1))
-            self.visualizer_canvas.create_line(i, height/2, i+10, y, 
-                                             fill="#9CA3AF", width=2, smooth=True)
-            self.visualizer_canvas.create_line(i+10, y, i+20, height/2, 
-                                             fill="#9CA3AF", width=2, smooth=True)
+        """Affiche une onde statique pour l'état d'inactivité"""
+        self._wave_version = None
+        self.draw_levels(self._idle_levels, 0.0, "#9CA3AF")
     
     def draw_active_wave(self):
-        """Simule une onde audio active pendant l'enregistrement"""
+        """Affiche les niveaux réels du microphone pendant l'enregistrement"""
         if not self.is_recording:
             return
-            
-        self.visualizer_canvas.delete("all")
-        width = self.visualizer_canvas.winfo_width() or 800
-        height = self.visualizer_canvas.winfo_height() or 40
-        
-        points = []
-        for i in range(0, width, 5):
-            # Simulation d'une onde plus dynamique
-            amplitude = 15 * abs(((i + time.time()*100) % 100)/100 - 0.5)
-            y = height/2 + amplitude * (1 if i % 10 == 0 else -1)
-            points.append(i)
-            points.append(y)
-        
-        if len(points) >= 4:  # Au moins 2 points (x,y)
-            self.visualizer_canvas.create_line(points, fill="#10B981", width=2, smooth=True)
-        
-        # Boucle d'animation
-        if self.is_recording:
-            self.root.after(50, self.draw_active_wave)
+        
+        meter = self.level_meter
+        if meter is not None:
+            version, levels, peak = meter.snapshot()
+            if version != self._wave_version:
+                self._wave_version = version
+                self.draw_levels(levels, peak, "#10B981")
+        
+        # Boucle d'animation à fréquence plafonnée
+        self.root.after(1000 // VISUALIZER_FPS, self.draw_active_wave)
     
     def pulse_animation(self):
         """Crée un effet de pulsation sur le bouton d'enregistrement"""
@@ -310,7 +2353,11 @@ class VoiceRecognitionApp:
     
     def toggle_recording(self):
         """Démarre ou arrête l'enregistrement audio"""
-        if self.model_fr is None or self.model_en is None:
+        lang = self.current_language.get()
+        if not self.is_recording and not self.speech.is_ready(lang):
+            for code in self.speech.required_languages(lang):
+                if not self.models.is_loaded(code):
+                    self.models.preload(code)
             self.status_label.configure(text="Veuillez attendre le chargement des modèles...")
             return
         
@@ -322,92 +2369,162 @@ class VoiceRecognitionApp:
                                        hover_color=("#B91C1C", "#7F1D1D"))
             self.status_label.configure(text="Écoute en cours...")
             
+            # Couper la synthèse vocale en cours
+            self.speech.stop_speaking()
+            
             # Démarrer l'animation de l'onde audio
             self.draw_active_wave()
             
-            # Démarrer l'enregistrement dans un thread séparé
-            threading.Thread(target=self.record_audio, daemon=True).start()
+            # Démarrer l'écoute sur la boucle du moteur
+            commands = self.command_mode.get()
+            if commands:
+                self.reload_commands()
+            self.level_meter = LevelMeter()
+            self.source = MicrophoneSource(meter=self.level_meter)
+            self.run_async(self.record_audio(self.source, lang, self.continuous_mode.get(), commands))
         else:
+            if self.source is not None:
+                self.source.stop()
             self.record_button.configure(text="🎤 Commencer l'écoute",
                                        fg_color=("#3B82F6", "#1E40AF"),
                                        hover_color=("#2563EB", "#1E3A8A"))
             self.status_label.configure(text="Écoute terminée")
             self.draw_idle_wave()
     
-    def record_audio(self):
-        """Enregistre l'audio et le fait reconnaître"""
-        if not self.is_recording:
+    async def record_audio(self, source, lang, continuous, commands=False):
+        """Écoute le microphone et transmet les résultats du moteur à l'interface"""
+        try:
+            async for event in self.speech.listen(source, lang, continuous=continuous,
+                                                  max_blocks=None if continuous else 8,  # ~4 secondes à 16kHz
+                                                  streaming=self.streaming, commands=commands,
+                                                  retain=not commands):
+                if event["type"] == "partial":
+                    self.show_partial(event["text"])
+                elif commands:
+                    self.cancel_partial()
+                    if not continuous and self.is_recording:
+                        self.root.after(0, self.toggle_recording)
+                    self.root.after(0, lambda event=event: self.run_command(event))
+                elif continuous:
+                    self.emit_utterance(event["lang"], event["text"], timings=event.get("timings"),
+                                        audio_id=event.get("audio_id"))
+                elif self.is_recording:
+                    self.root.after(0, self.toggle_recording)
+                    self.emit_utterance(event["lang"], event["text"], allow_empty=True,
+                                        timings=event.get("timings"), audio_id=event.get("audio_id"))
+        except Exception as e:
+            self.update_status(f"Erreur: {str(e)}", "#F44336")
+        finally:
+            source.stop()
+            stats = source.stats()
+            lost = stats["dropped"] + stats.get("device_overflows", 0)
+            if lost:
+                self.update_status(f"Attention: {lost} blocs audio perdus", "#F59E0B")
+    
+    def emit_utterance(self, lang, text, allow_empty=False, timings=None, audio_id=None):
+        """Transmet un énoncé reconnu à l'interface et à la synthèse vocale"""
+        self.cancel_partial()
+        if not (text or allow_empty):
             return
-            
-        def callback(indata, frames, time, status):
-            if status:
-                print(status)
-            if self.is_recording:
-                self.audio_queue.put(bytes(indata))
+        emitted = time.perf_counter()
         
+        def deliver():
+            dispatch = time.perf_counter() - emitted
+            METRICS.observe("dispatch", dispatch)
+            self._last_timings = dict(timings or {}, dispatch_ms=round(dispatch * 1000, 2))
+            self.update_result(lang, text, audio_id)
+            self.report_timings()
+        self.root.after(0, deliver)
+    
+    def report_timings(self):
+        """Met à jour l'affichage des latences et le fichier de métriques"""
+        if self.metrics_file:
+            try:
+                METRICS.export(self.metrics_file)
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+        if not self.debug:
+            return
+        labels = {"decode_ms": "décodage", "finalize_ms": "fin", "dispatch_ms": "UI"}
+        parts = [f"{label} {self._last_timings[key]:.0f} ms"
+                 for key, label in labels.items() if key in self._last_timings]
+        queue_p95 = METRICS.quantile("queue", 0.95)
+        if queue_p95 is not None:
+            parts.insert(0, f"file p95 {queue_p95 * 1000:.0f} ms")
+        for stage, label in (("tts_render", "rendu TTS"), ("tts_play", "lecture")):
+            if stage in METRICS.last:
+                parts.append(f"{label} {METRICS.last[stage] * 1000:.0f} ms")
+        self.debug_label.configure(text=" · ".join(parts))
+    
+    def show_partial(self, text):
+        """Affiche le texte partiel en regroupant les mises à jour de l'interface"""
+        with self._partial_lock:
+            self._pending_partial = text
+            if self._partial_scheduled:
+                return
+            self._partial_scheduled = True
+        self.root.after(PARTIAL_UI_INTERVAL_MS, self._flush_partial)
+    
+    def cancel_partial(self):
+        """Annule l'affichage du texte partiel en attente"""
+        with self._partial_lock:
+            self._pending_partial = None
+    
+    def _flush_partial(self):
+        with self._partial_lock:
+            text = self._pending_partial
+            self._pending_partial = None
+            self._partial_scheduled = False
+        if text:
+            self.result_label.configure(text=f"{text}…")
+    
+    def reload_commands(self):
+        """Recharge les phrases de commande si leur fichier a changé"""
         try:
-            with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16',
-                                channels=1, callback=callback):
-                
-                audio_data = b""
-                for _ in range(8):  # ~4 secondes à 16kHz
-                    if not self.is_recording:
-                        break
-                    try:
-                        chunk = self.audio_queue.get(timeout=0.5)
-                        audio_data += chunk
-                    except queue.Empty:
-                        continue
-                
-                if audio_data and self.is_recording:
-                    self.root.after(0, self.toggle_recording)
-                    
-                    # Do recognition in this thread
-                    lang, text = self.recognize_language(audio_data)
-                    
-                    # Schedule UI update on main thread
-                    self.root.after(0, lambda: self.update_result(lang, text))
+            mtime = os.path.getmtime(self.commands_path)
+        except OSError:
+            return
+        if mtime == self._commands_mtime:
+            return
+        try:
+            self.speech.set_commands(CommandGrammar.load(self.commands_path))
+            self._commands_mtime = mtime
+        except (OSError, ValueError) as e:
+            self.update_status(f"Erreur dans {COMMANDS_FILE_NAME}: {e}", "#F44336")
+    
+    def run_command(self, event):
+        """Exécute l'intention reconnue en mode commande"""
+        intent = event.get("intent")
+        if intent is None:
+            self.result_label.configure(text="[Commande non reconnue]")
+            return
+        self.result_label.configure(text=f"Commande: {event['text']} ({event['confidence']:.0%})")
         
-        except Exception as e:
-            self.root.after(0, lambda: self.update_status(f"Erreur: {str(e)}", "#F44336"))
-            
+        actions = {
+            "stop": self.toggle_recording if self.is_recording else self.speech.stop_speaking,
+            "replay": self.replay_last,
+            "clear": self.clear_history,
+            "french": lambda: self.change_language("fr"),
+            "english": lambda: self.change_language("en"),
+        }
+        action = actions.get(intent)
+        if action is not None:
+            action()
+    
     def recognize_language(self, audio_data):
         """Reconnaît la langue et le texte parlé"""
-        # Utiliser le modèle sélectionné
-        if self.current_language.get() == "auto":
-            # Mode automatique: tester les deux langues
-            rec_fr = KaldiRecognizer(self.model_fr, 16000)
-            rec_en = KaldiRecognizer(self.model_en, 16000)
-            
-            rec_fr.AcceptWaveform(audio_data)
-            result_fr = json.loads(rec_fr.Result())
-            text_fr = result_fr.get("text", "")
-            
-            rec_en.AcceptWaveform(audio_data)
-            result_en = json.loads(rec_en.Result())
-            text_en = result_en.get("text", "")
-            
-            # Sélectionner la langue avec le score de confiance le plus élevé
-            conf_fr = result_fr.get("confidence", 0) if "confidence" in result_fr else len(text_fr)
-            conf_en = result_en.get("confidence", 0) if "confidence" in result_en else len(text_en)
-            
-            if conf_fr > conf_en:
-                return "fr", text_fr
-            else:
-                return "en", text_en
-        else:
-            # Mode spécifique: utiliser la langue sélectionnée
-            model = self.model_fr if self.current_language.get() == "fr" else self.model_en
-            recognizer = KaldiRecognizer(model, 16000)
-            
-            recognizer.AcceptWaveform(audio_data)
-            result = json.loads(recognizer.Result())
-            text = result.get("text", "")
-            
-            return self.current_language.get(), text
+        result = self.speech.recognize(audio_data, self.current_language.get())
+        return result["lang"], result["text"]
     
-    def update_result(self, lang, text):
+    def update_result(self, lang, text, audio_id=None):
         """Met à jour l'interface avec le résultat de la reconnaissance"""
+        if audio_id is not None:
+            self.last_utterance = {"audio_id": audio_id, "entry_id": None, "lang": lang}
+            if REDECODE_IN_BACKGROUND:
+                # Préparer la transcription dans les autres langues déjà chargées
+                self.speech.prefetch(audio_id, [code for code in self.models.languages()
+                                                if code != lang and self.models.is_loaded(code)])
+        
         # Si texte vide, afficher un message
         if not text:
             self.result_label.configure(text="[Aucun texte reconnu]")
@@ -416,62 +2533,33 @@ class VoiceRecognitionApp:
         # Afficher le résultat
         self.result_label.configure(text=text)
         
-        # Ajouter à l'historique
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        lang_display = "🇫🇷" if lang == "fr" else "🇬🇧"
-        
-        history_entry = ctk.CTkFrame(self.history_frame)
-        history_entry.pack(fill="x", padx=5, pady=2, ipadx=5, ipady=5)
-        
-        header_frame = ctk.CTkFrame(history_entry, fg_color="transparent")
-        header_frame.pack(fill="x", padx=5, pady=(5, 0))
-        
-        time_label = ctk.CTkLabel(header_frame, text=timestamp, font=ctk.CTkFont(size=10))
-        time_label.pack(side="left")
-        
-        lang_label = ctk.CTkLabel(header_frame, text=lang_display, font=ctk.CTkFont(size=12))
-        lang_label.pack(side="right")
-        
-        text_label = ctk.CTkLabel(history_entry, text=text, 
-                                 justify="left", anchor="w", 
-                                 wraplength=400)
-        text_label.pack(fill="x", padx=10, pady=5)
-        
-        # Sauvegarder dans la liste d'historique
-        self.history.append((lang, text))
+        # Ajouter à l'historique (la vue défile jusqu'à la nouvelle entrée)
+        entry_id = self.history.add(lang, text)
+        self.history_view.append()
+        if audio_id is not None:
+            self.last_utterance["entry_id"] = entry_id
         
         # Activer le bouton de relecture
         self.replay_button.configure(state="normal")
         
-        # Faire défiler vers le bas
-        self.history_frame._parent_canvas.yview_moveto(1.0)
-        
         # Synthèse vocale
         self.speak_text(lang, text)
     
     def speak_text(self, lang, text):
         """Répond avec la synthèse vocale dans la langue détectée"""
-        # Définir la voix appropriée
-        voices = self.engine.getProperty('voices')
-        
-        for voice in voices:
-            voice_name = voice.name.lower()
-            if (lang == "fr" and ("french" in voice_name or "français" in voice_name)) or \
-               (lang == "en" and "english" in voice_name and "french" not in voice_name):
-                self.engine.setProperty('voice', voice.id)
-                break
-        
-        # Synthèse vocale dans un thread pour ne pas bloquer l'interface
-        def tts_thread():
-            self.engine.say(text)
-            self.engine.runAndWait()
-        
-        threading.Thread(target=tts_thread, daemon=True).start()
+        # Une nouvelle réponse remplace celle en cours de lecture
+        future = self.speech.say(text, lang, interrupt=True)
+        future.add_done_callback(lambda _: self.root.after(0, self.report_timings))
     
     def change_language(self, lang):
         """Change la langue active"""
         self.current_language.set(lang)
         
+        # Charger le modèle de cette langue s'il n'est pas en mémoire
+        for code in self.speech.required_languages(lang):
+            if not self.models.is_loaded(code):
+                self.models.preload(code)
+        
         # Mettre à jour l'apparence des boutons
         if lang == "fr":
             self.fr_button.configure(fg_color=("#2563EB", "#1E3A8A"))
@@ -481,15 +2569,52 @@ class VoiceRecognitionApp:
             self.fr_button.configure(fg_color=("#E0E7FF", "#3B4F81"))
             self.en_button.configure(fg_color=("#2563EB", "#1E3A8A"))
             self.status_label.configure(text="Language: English")
+        
+        # Mauvaise langue choisie pour le dernier énoncé: le redécoder sans le faire répéter.
+        # En écoute continue, le dernier énoncé est terminé et peut l'être pendant l'écoute;
+        # sinon, l'enregistrement en cours va le remplacer.
+        utterance = self.last_utterance
+        redecodable = not self.is_recording or self.continuous_mode.get()
+        if utterance is not None and utterance["lang"] != lang and redecodable:
+            future = self.speech.redecode(utterance["audio_id"], lang)
+            if not future.done():
+                self.result_label.configure(text=f"Nouveau décodage en {LANGUAGE_NAMES.get(lang, lang)}…")
+            future.add_done_callback(lambda f: self.root.after(0, lambda: self.show_redecoded(utterance, lang, f)))
+    
+    def show_redecoded(self, utterance, lang, future):
+        """Remplace le dernier résultat par son redécodage dans la nouvelle langue"""
+        if future.exception() is not None:
+            self.update_status(f"Erreur: {future.exception()}", "#F44336")
+            return
+        result = future.result()
+        if utterance is not self.last_utterance:
+            return
+        if result is None:
+            self.update_status("Énoncé trop ancien pour être redécodé", "#F59E0B")
+            return
+        utterance["lang"] = lang
+        text = result["text"]
+        if not text:
+            self.result_label.configure(text="[Aucun texte reconnu]")
+            return
+        self.result_label.configure(text=text)
+        
+        # Corriger l'entrée d'historique plutôt que d'en ajouter une
+        if utterance["entry_id"] is not None:
+            self.history.update(utterance["entry_id"], lang, text)
+            self.history_view.refresh()
+        else:
+            utterance["entry_id"] = self.history.add(lang, text)
+            self.history_view.append()
+        self.replay_button.configure(state="normal")
+        self.speak_text(lang, text)
     
     def clear_history(self):
         """Efface l'historique des reconnaissances"""
-        # Effacer les widgets
-        for widget in self.history_frame.winfo_children():
-            widget.destroy()
-        
-        # Effacer la liste d'historique
+        # Effacer l'historique enregistré puis la vue
         self.history.clear()
+        self.last_utterance = None
+        self.history_view.refresh()
         
         # Désactiver le bouton de relecture
         self.replay_button.configure(state="disabled")
@@ -499,18 +2624,1021 @@ class VoiceRecognitionApp:
     
     def replay_last(self):
         """Rejoue la dernière entrée vocale"""
-        if not self.history:
+        entry = self.history.last()
+        if entry is None:
             return
             
-        lang, text = self.history[-1]
+        _, _, lang, text = entry
         self.result_label.configure(text=text)
         self.speak_text(lang, text)
+    
+    def show_entry(self, entry):
+        """Affiche le texte complet d'une entrée choisie dans l'historique"""
+        self.result_label.configure(text=entry[3])
+
+# ===== TRANSCRIPTION SANS INTERFACE =====
+AUDIO_EXTENSIONS = (".wav", ".raw", ".pcm")
+
+def convert_audio(path, out, raw_rate=SAMPLE_RATE):
+    """Convertit un fichier WAV ou PCM brut 16 bits en mono 16 kHz, écrit dans `out`
+
+    Le fichier est lu par blocs de CONVERT_BLOCK_FRAMES trames: la mémoire
+    utilisée ne dépend pas de la durée de l'enregistrement.
+    """
+    import numpy as np
+    if path.lower().endswith(".wav"):
+        source = wave.open(path, "rb")
+        if source.getsampwidth() != 2:
+            source.close()
+            raise ValueError("Only 16-bit PCM WAV files are supported")
+        channels, rate = source.getnchannels(), source.getframerate()
+        read = source.readframes
+    else:
+        source = open(path, "rb")
+        channels, rate = 1, raw_rate
+        read = lambda frames: source.read(frames * 2)
+    
+    step = rate / SAMPLE_RATE
+    produced = 0  # échantillons de sortie déjà écrits
+    base = 0  # indice d'entrée du premier échantillon de `pending`
+    pending = np.zeros(0)  # dernier échantillon du bloc précédent, pour interpoler la jonction
+    with source:
+        while True:
+            data = read(CONVERT_BLOCK_FRAMES)
+            if not data:
+                break
+            if channels == 1 and rate == SAMPLE_RATE:
+                out.write(data)
+                continue
+            samples = np.frombuffer(data[:len(data) - len(data) % (2 * channels)], dtype=np.int16)
+            samples = samples.reshape(-1, channels).mean(axis=1)
+            if rate == SAMPLE_RATE:
+                out.write(samples.astype(np.int16).tobytes())
+                continue
+            samples = np.concatenate([pending, samples])
+            # Positions de sortie qui tombent avant le dernier échantillon du bloc
+            end = max(produced, int(np.ceil((base + len(samples) - 1) / step)))
+            positions = np.arange(produced, end) * step - base
+            out.write(np.interp(positions, np.arange(len(samples)), samples).astype(np.int16).tobytes())
+            produced = end
+            base += len(samples) - 1
+            pending = samples[-1:]
+    if len(pending):
+        # Fin du fichier: les dernières positions reprennent le dernier échantillon
+        end = int(np.ceil((base + 1) / step))
+        out.write(np.full(max(0, end - produced), pending[0]).astype(np.int16).tobytes())
+
+def read_audio(path, raw_rate=SAMPLE_RATE):
+    """Lit un fichier WAV ou PCM brut 16 bits et le convertit en mono 16 kHz"""
+    out = io.BytesIO()
+    convert_audio(path, out, raw_rate)
+    return out.getvalue()
+
+def find_audio_files(paths):
+    """Liste les fichiers audio donnés ou contenus dans les dossiers donnés"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                files.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+# Moteur chargé une seule fois par processus de travail
+_worker_engine = None
+_worker_error = None
+_worker_lang = None
+_worker_raw_rate = SAMPLE_RATE
+
+def load_transcribe_engine(lang, raw_rate):
+    """Charge les modèles nécessaires dans le processus courant
+
+    Appelée par le parent avant de créer les processus de travail: un modèle
+    manquant échoue immédiatement au lieu de faire échouer chaque processus.
+    Avec fork, les processus héritent du moteur et partagent ses modèles.
+    """
+    global _worker_engine, _worker_error, _worker_lang, _worker_raw_rate
+    shared = multiprocessing.get_start_method() == "fork"
+    engine = SpeechEngine(ModelRegistry(pool_size=1), tts=False)
+    for code in engine.required_languages(lang):
+        if shared:
+            engine.models.get(code)
+        else:
+            engine.models.model_path(code)  # chaque processus chargera ses modèles
+    _worker_engine = engine if shared else None
+    _worker_error = None
+    _worker_lang = lang
+    _worker_raw_rate = raw_rate
+
+def _init_transcribe_worker(lang, raw_rate):
+    global _worker_engine, _worker_error, _worker_lang, _worker_raw_rate
+    _worker_lang = lang
+    _worker_raw_rate = raw_rate
+    if _worker_engine is not None:
+        return
+    # Une exception ici ferait relancer le processus indéfiniment par le Pool:
+    # elle est conservée et rapportée pour chaque fichier
+    try:
+        engine = SpeechEngine(ModelRegistry(pool_size=1), tts=False)
+        for code in engine.required_languages(lang):
+            engine.models.get(code)
+        _worker_engine = engine
+    except Exception as e:
+        _worker_error = f"{type(e).__name__}: {e}"
+
+def transcribe_file(path):
+    """Transcrit un fichier dans un processus de travail, retourne une entrée JSON"""
+    if _worker_error is not None:
+        return {"file": path, "error": _worker_error}
+    start = time.perf_counter()
+    try:
+        audio_data = read_audio(path, _worker_raw_rate)
+        result = _worker_engine.recognize(audio_data, _worker_lang)
+    except Exception as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+    duration = len(audio_data) / 2 / SAMPLE_RATE
+    elapsed = time.perf_counter() - start
+    return {
+        "file": path,
+        "lang": result["lang"],
+        "text": result["text"],
+        "confidence": round(result["confidence"], 4),
+        "duration": round(duration, 3),
+        "elapsed": round(elapsed, 3),
+        "words": result["words"],
+    }
+
+# ===== TRANSCRIPTION LONGUE =====
+def wav_data_region(path):
+    """Position et taille du bloc de données d'un fichier WAV, avec son format
+
+    Le format est (codage, canaux, fréquence, octets/s, alignement, bits).
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV file has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                return f.tell(), size, fmt
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                size -= 16
+            f.seek(size + (size & 1), 1)
+
+def map_audio(path, raw_rate=SAMPLE_RATE, scratch=None):
+    """Localise le PCM mono 16 kHz d'un fichier pour le projeter en mémoire
+
+    Retourne (chemin, décalage, échantillons, temporaire). Un fichier dans
+    un autre format est d'abord converti dans un fichier temporaire, créé
+    dans le dossier `scratch` s'il est donné.
+    """
+    if path.lower().endswith(".wav"):
+        offset, size, fmt = wav_data_region(path)
+        native = fmt is not None and fmt[0] in (1, 0xFFFE) and fmt[1] == 1 \
+            and fmt[2] == SAMPLE_RATE and fmt[5] == 16
+    else:
+        offset, size, native = 0, os.path.getsize(path), raw_rate == SAMPLE_RATE
+    if native:
+        # Taille parfois inconnue (0xFFFFFFFF) pour les WAV enregistrés en flux
+        size = min(size, os.path.getsize(path) - offset)
+        return path, offset, size // 2, False
+    
+    fd, tmp_path = tempfile.mkstemp(suffix=".pcm", dir=scratch)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            convert_audio(path, f, raw_rate)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, 0, os.path.getsize(tmp_path) // 2, True
+
+def plan_segments(samples, sample_rate=SAMPLE_RATE):
+    """Découpe un long enregistrement aux silences, retourne [(index, début, fin)]
+
+    Chaque coupure est placée au milieu du silence le plus proche de
+    LONGFORM_SEGMENT_S, sans dépasser LONGFORM_MAX_SEGMENT_S; à défaut de
+    silence, sur la trame la plus calme.
+    """
+    import numpy as np
+    frame_len = sample_rate * VAD_FRAME_MS // 1000
+    step = frame_len * 500  # tranches de 10 s pour borner la mémoire
+    levels = np.concatenate([frame_rms(samples[i:i + step], frame_len)
+                             for i in range(0, len(samples), step)] or [np.zeros(0, np.float32)])
+    if len(levels):
+        threshold = max(VAD_MIN_RMS, float(np.percentile(levels, 10)) * VAD_NOISE_RATIO)
+    else:
+        threshold = VAD_MIN_RMS
+    quiet = levels < threshold
+    target = LONGFORM_SEGMENT_S * 1000 // VAD_FRAME_MS
+    longest = LONGFORM_MAX_SEGMENT_S * 1000 // VAD_FRAME_MS
+    min_silence = LONGFORM_MIN_SILENCE_MS // VAD_FRAME_MS
+    
+    cuts = [0]
+    while len(levels) - cuts[-1] > longest:
+        low, high = cuts[-1] + target // 2, cuts[-1] + longest
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet[low:high].astype(np.int8), [0]))))
+        starts, ends = edges[::2], edges[1::2]
+        lengths = ends - starts
+        middles = low + (starts + ends) // 2
+        if (lengths >= min_silence).any():
+            middles = middles[lengths >= min_silence]
+            cut = middles[np.argmin(np.abs(middles - (cuts[-1] + target)))]
+        elif len(lengths):
+            cut = middles[np.argmax(lengths)]
+        else:
+            cut = low + int(np.argmin(levels[low:high]))
+        cuts.append(int(cut))
+    
+    bounds = [cut * frame_len for cut in cuts] + [len(samples)]
+    return [(index, bounds[index], bounds[index + 1]) for index in range(len(bounds) - 1)
+            if bounds[index + 1] > bounds[index]]
+
+# PCM projeté en mémoire dans chaque processus de travail
+_worker_audio = None  # ((chemin, décalage, échantillons), memmap) du dernier fichier décodé
+
+def transcribe_segment(segment):
+    """Décode un segment dans un processus de travail, avec des temps absolus"""
+    import numpy as np
+    global _worker_audio
+    index, start, end, region = segment
+    if _worker_error is not None:
+        raise RuntimeError(_worker_error)
+    if _worker_audio is None or _worker_audio[0] != region:
+        path, offset, count = region
+        _worker_audio = (region, np.memmap(path, dtype=np.int16, mode="r", offset=offset, shape=(count,)))
+    view = memoryview(_worker_audio[1][start:end]).cast("B")
+    result = _worker_engine.recognize(view, _worker_lang)
+    offset = start / SAMPLE_RATE
+    return {
+        "index": index,
+        "start": round(offset, 3),
+        "end": round(end / SAMPLE_RATE, 3),
+        "lang": result["lang"],
+        "text": result["text"],
+        "confidence": round(result["confidence"], 4),
+        "words": [dict(word, start=round(word["start"] + offset, 3), end=round(word["end"] + offset, 3))
+                  for word in result["words"]],
+    }
+
+def transcribe_long(path, pool, raw_rate=SAMPLE_RATE, scratch=None):
+    """Transcrit un long enregistrement découpé aux silences, segments répartis sur `pool`
+
+    Le Pool est partagé par tous les fichiers de la commande: ses processus
+    chargent les modèles une seule fois et gardent le dernier fichier projeté.
+    """
+    import numpy as np
+    start = time.perf_counter()
+    try:
+        region = map_audio(path, raw_rate, scratch)
+    except Exception as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+    audio_path, offset, count, temporary = region
+    try:
+        segments = []
+        if count:
+            samples = np.memmap(audio_path, dtype=np.int16, mode="r", offset=offset, shape=(count,))
+            segments = plan_segments(samples)
+            del samples
+        results = list(pool.imap(transcribe_segment, [(index, begin, end, region[:3])
+                                                       for index, begin, end in segments]))
+    except Exception as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        if temporary:
+            try:
+                os.remove(audio_path)
+            except OSError:
+                pass  # encore projeté par un processus (Windows): supprimé avec `scratch`
+    
+    # Langue majoritaire en durée, confiance moyenne pondérée par la durée
+    durations = {}
+    for segment in results:
+        durations[segment["lang"]] = durations.get(segment["lang"], 0.0) + segment["end"] - segment["start"]
+    total = sum(segment["end"] - segment["start"] for segment in results) or 1.0
+    return {
+        "file": path,
+        "lang": max(durations, key=durations.get) if durations else lang,
+        "text": " ".join(segment["text"] for segment in results if segment["text"]),
+        "confidence": round(sum(segment["confidence"] * (segment["end"] - segment["start"])
+                                for segment in results) / total, 4),
+        "duration": round(count / SAMPLE_RATE, 3),
+        "elapsed": round(time.perf_counter() - start, 3),
+        "segments": [{key: value for key, value in segment.items() if key != "words"} for segment in results],
+        "words": [word for segment in results for word in segment["words"]],
+    }
+
+def transcribe_stdin(lang, out):
+    """Transcrit au fil de l'eau le PCM 16 bits mono 16 kHz lu sur l'entrée standard
+
+    Une ligne JSON est écrite par énoncé dès que sa fin est détectée, avec
+    des temps relatifs au début du flux.
+    """
+    engine = SpeechEngine(ModelRegistry(pool_size=1), tts=False)
+    source = StdinSource()
+    try:
+        for event in engine.recognize_stream(source, lang, continuous=True):
+            if event["type"] != "final" or not event["text"]:
+                continue
+            entry = {"file": "-", **{key: event[key] for key in ("start", "end", "lang", "text")}}
+            entry["confidence"] = round(event["confidence"], 4)
+            entry["words"] = [dict(word, start=round(word["start"] + event["start"], 3),
+                                   end=round(word["end"] + event["start"], 3)) for word in event["words"]]
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        source.stop()
+    return 0
+
+def transcribe_main(argv):
+    """Point d'entrée de la commande `speak.py transcribe`"""
+    parser = argparse.ArgumentParser(prog="speak.py transcribe",
+                                     description="Transcrit des fichiers WAV / PCM brut en JSONL")
+    parser.add_argument("paths", nargs="+",
+                        help="fichiers ou dossiers à transcrire, ou - pour un flux PCM 16 kHz sur l'entrée standard")
+    parser.add_argument("--lang", default="fr", choices=list(MODEL_DIRS) + ["auto"])
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="nombre de processus de travail")
+    parser.add_argument("--raw-rate", type=int, default=SAMPLE_RATE,
+                        help="fréquence d'échantillonnage des fichiers PCM bruts")
+    parser.add_argument("--long-form", action="store_true",
+                        help="enregistrements longs: découpage aux silences, segments décodés en parallèle")
+    parser.add_argument("-o", "--output", help="fichier JSONL de sortie (défaut: sortie standard)")
+    args = parser.parse_args(argv)
+    
+    stream = args.paths == ["-"]
+    if stream and args.raw_rate != SAMPLE_RATE:
+        parser.error(f"standard input must be {SAMPLE_RATE} Hz mono PCM")
+    files = [] if stream else find_audio_files(args.paths)
+    if not files and not stream:
+        parser.error("no audio files found")
+    
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failures = 0
+    try:
+        if stream:
+            return transcribe_stdin(args.lang, out)
+        # Modèles chargés une seule fois pour toute la commande
+        try:
+            load_transcribe_engine(args.lang, args.raw_rate)
+        except Exception as e:
+            print(f"Error loading models: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+        # Un seul Pool pour toute la commande: chaque processus charge ses modèles une fois
+        jobs = max(1, args.jobs if args.long_form else min(args.jobs, len(files)))
+        with tempfile.TemporaryDirectory(prefix="speak-", ignore_cleanup_errors=True) as scratch, \
+                multiprocessing.Pool(jobs, initializer=_init_transcribe_worker,
+                                     initargs=(args.lang, args.raw_rate)) as pool:
+            if args.long_form:
+                entries = (transcribe_long(path, pool, args.raw_rate, scratch) for path in files)
+            else:
+                entries = pool.imap_unordered(transcribe_file, files)
+            for entry in entries:
+                failures += "error" in entry
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+# ===== SERVEUR DE TRANSCRIPTION =====
+class TranscriptionServer:
+    """Serveur TCP local de transcription en flux
+
+    Protocole: le client envoie une ligne JSON de configuration, par exemple
+    {"lang": "fr", "continuous": true, "commands": false}, puis le PCM 16 bits mono 16 kHz brut,
+    et ferme son côté écriture à la fin. Le serveur répond par une ligne JSON
+    par événement ("partial", "final" ou "error"). Toutes les connexions
+    partagent les mêmes modèles; chacune emprunte ses propres recognizers.
+    Au-delà de `max_sessions` sessions simultanées, une connexion attend
+    qu'une place se libère avant que sa configuration soit lue.
+    """
+
+    def __init__(self, engine, max_sessions=SERVER_MAX_SESSIONS):
+        self.engine = engine
+        self.max_sessions = max_sessions
+        self.sessions = asyncio.Semaphore(max_sessions)
+
+    @staticmethod
+    async def send(writer, event):
+        writer.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    @staticmethod
+    async def read_blocks(reader):
+        """Lit le PCM du client bloc par bloc"""
+        while True:
+            try:
+                yield await reader.readexactly(BLOCK_SIZE * 2)
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    yield e.partial
+                return
+
+    async def handle(self, reader, writer):
+        """Traite une connexion client"""
+        # Le client en attente est ralenti par TCP: son audio reste dans les tampons
+        await self.sessions.acquire()
+        try:
+            config = json.loads(await reader.readline() or b"{}")
+            lang = config.get("lang", "fr")
+            if lang != "auto" and lang not in self.engine.models.languages():
+                await self.send(writer, {"type": "error", "error": f"unknown language: {lang}"})
+                return
+            async for event in self.engine.listen(self.read_blocks(reader), lang,
+                                                  continuous=config.get("continuous", True),
+                                                  commands=config.get("commands", False)):
+                await self.send(writer, event)
+        except ConnectionError:
+            pass
+        except Exception as e:
+            try:
+                await self.send(writer, {"type": "error", "error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            self.sessions.release()
+            writer.close()
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Listening on {host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+def serve_main(argv):
+    """Point d'entrée de la commande `speak.py serve`"""
+    parser = argparse.ArgumentParser(prog="speak.py serve",
+                                     description="Serveur local de transcription en flux")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    parser.add_argument("--commands", help="fichier JSON des phrases du mode commande")
+    parser.add_argument("--metrics-port", type=int,
+                        help=f"expose les métriques en HTTP (par exemple {METRICS_PORT})")
+    args = parser.parse_args(argv)
+    
+    engine = SpeechEngine(ModelRegistry(pool_size=args.max_sessions), tts=False,
+                          commands=CommandGrammar.load(args.commands) if args.commands else None)
+    for code in engine.models.languages():
+        if engine.models.fits(code):
+            engine.models.get(code)
+    server = TranscriptionServer(engine, args.max_sessions)
+    
+    async def serve_all():
+        tasks = [server.serve(args.host, args.port)]
+        if args.metrics_port:
+            tasks.append(serve_metrics(args.host, args.metrics_port))
+        await asyncio.gather(*tasks)
+    try:
+        asyncio.run(serve_all())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+async def replay_file(path, host, port, lang, speed, out):
+    """Envoie un fichier audio au serveur et écrit les événements reçus
+
+    Retourne True si le serveur a produit au moins un résultat final et
+    aucune erreur.
+    """
+    audio_data = read_audio(path)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(json.dumps({"lang": lang}).encode("utf-8") + b"\n")
+    
+    async def send_audio():
+        step = BLOCK_SIZE * 2
+        try:
+            for offset in range(0, len(audio_data), step):
+                writer.write(audio_data[offset:offset + step])
+                await writer.drain()
+                if speed:
+                    # Rejouer au rythme réel (multiplié par speed)
+                    await asyncio.sleep(BLOCK_SIZE / SAMPLE_RATE / speed)
+            writer.write_eof()
+        except ConnectionError:
+            pass
+    
+    sender = asyncio.ensure_future(send_audio())
+    finals = errors = 0
+    try:
+        async for line in reader:
+            event = json.loads(line)
+            event["file"] = path
+            finals += event["type"] == "final"
+            errors += event["type"] == "error"
+            out.write(json.dumps(event, ensure_ascii=False) + "\n")
+            out.flush()
+    except ConnectionError:
+        errors += 1
+    finally:
+        await sender
+        writer.close()
+    return finals > 0 and not errors
+
+def client_main(argv):
+    """Point d'entrée de la commande `speak.py client`"""
+    parser = argparse.ArgumentParser(prog="speak.py client",
+                                     description="Rejoue des fichiers WAV vers le serveur de transcription")
+    parser.add_argument("paths", nargs="+", help="fichiers ou dossiers à rejouer")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--lang", default="fr", choices=list(MODEL_DIRS) + ["auto"])
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="vitesse de rejeu (0 = aussi vite que possible)")
+    parser.add_argument("--jobs", type=int, default=SERVER_MAX_SESSIONS,
+                        help="fichiers rejoués simultanément")
+    args = parser.parse_args(argv)
+    
+    files = find_audio_files(args.paths)
+    if not files:
+        parser.error("no audio files found")
+    
+    async def replay_all():
+        # Une connexion par fichier, au plus `jobs` à la fois
+        slots = asyncio.Semaphore(max(1, args.jobs))
+        
+        async def replay(path):
+            async with slots:
+                try:
+                    return await replay_file(path, args.host, args.port, args.lang, args.speed, sys.stdout)
+                except (OSError, ValueError) as e:
+                    print(f"{path}: {type(e).__name__}: {e}", file=sys.stderr)
+                    return False
+        return await asyncio.gather(*(replay(path) for path in files))
+    return 0 if all(asyncio.run(replay_all())) else 1
+
+# ===== CAPTURE MULTI-SOURCES =====
+def _decode_process_main(inbox, outbox):
+    """Boucle d'un processus de décodage: un fil par flux hébergé"""
+    engine = SpeechEngine(ModelRegistry(pool_size=CAPTURE_STREAMS_PER_PROCESS), tts=False)
+    streams = {}  # id de flux -> file de blocs
+    threads = []
+    
+    def decode(stream_id, lang, continuous, chunks):
+        try:
+            for event in engine.recognize_stream(iter(chunks.get, None), lang, continuous=continuous):
+                outbox.put((stream_id, event))
+        except Exception as e:
+            outbox.put((stream_id, {"type": "error", "error": f"{type(e).__name__}: {e}"}))
+        finally:
+            outbox.put((stream_id, None))
+    
+    for kind, stream_id, payload in iter(inbox.get, None):
+        if kind == "open":
+            chunks = streams[stream_id] = queue.Queue()
+            thread = threading.Thread(target=decode, args=(stream_id, *payload, chunks), daemon=True)
+            thread.start()
+            threads.append(thread)
+        elif kind == "audio":
+            streams[stream_id].put(payload)
+        elif kind == "close":
+            streams.pop(stream_id).put(None)
+    # Arrêt demandé avant la fermeture de tous les flux: terminer ceux qui restent
+    for chunks in streams.values():
+        chunks.put(None)
+    for thread in threads:
+        thread.join()
+    outbox.put(None)
+
+class DecodeProcess:
+    """Processus de décodage hébergeant plusieurs flux
+
+    Les blocs PCM lui sont envoyés par une file multiprocessing et ses
+    événements reviennent par une autre file; `listen` a la même forme que
+    SpeechEngine.listen.
+    """
+
+    def __init__(self):
+        self.inbox = multiprocessing.Queue()
+        self.outbox = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_decode_process_main,
+                                               args=(self.inbox, self.outbox), daemon=True)
+        self.process.start()
+        self.streams = {}  # id de flux -> (boucle, file d'événements)
+        self.ids = itertools.count()
+        self.reader = threading.Thread(target=self._read_events, daemon=True)
+        self.reader.start()
+
+    def _read_events(self):
+        for stream_id, event in iter(self.outbox.get, None):
+            target = self.streams.get(stream_id)
+            if target is not None:
+                loop, events = target
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def listen(self, source, lang, continuous=True):
+        """Itère sur les événements d'une source décodée dans le processus"""
+        stream_id = next(self.ids)
+        events = asyncio.Queue()
+        self.streams[stream_id] = (asyncio.get_running_loop(), events)
+        self.inbox.put(("open", stream_id, (lang, continuous)))
+        stop = threading.Event()
+        
+        def forward():
+            try:
+                for chunk in itertools.takewhile(lambda _: not stop.is_set(), source):
+                    self.inbox.put(("audio", stream_id, bytes(chunk)))
+            finally:
+                self.inbox.put(("close", stream_id, None))
+        
+        threading.Thread(target=forward, daemon=True).start()
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            stop.set()
+            self.streams.pop(stream_id, None)
+
+    def close(self):
+        self.inbox.put(None)
+        self.process.join(CAPTURE_CLOSE_TIMEOUT_S)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+def parse_capture_input(text):
+    """Analyse une entrée `label=..,device=..,channel=..,lang=..` ou `label=..,file=..,lang=..`
+
+    Une entrée `file` rejoue un enregistrement au rythme réel, comme un micro.
+    """
+    spec = {"label": None, "device": None, "channel": None, "file": None, "lang": "fr"}
+    for part in text.split(","):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        if key not in spec or not value:
+            raise ValueError(f"invalid capture input: {text}")
+        spec[key] = int(value) if key in ("device", "channel") and value.isdigit() else value
+    if spec["channel"] is not None and not isinstance(spec["channel"], int):
+        raise ValueError(f"invalid channel: {spec['channel']}")
+    if spec["file"] is not None and (spec["device"] is not None or spec["channel"] is not None):
+        raise ValueError(f"file input takes no device or channel: {text}")
+    if spec["lang"] != "auto" and spec["lang"] not in MODEL_DIRS:
+        raise ValueError(f"unknown language: {spec['lang']}")
+    if spec["file"] is not None:
+        spec["label"] = spec["label"] or os.path.basename(spec["file"])
+    spec["label"] = spec["label"] or f"{spec['device'] or 'default'}:{spec['channel'] or 0}"
+    return spec
+
+class MultiCapture:
+    """Capture et transcription simultanées de plusieurs micros ou canaux
+
+    Chaque entrée a sa source, ses recognizers et sa langue. Les canaux
+    d'un même périphérique partagent un seul flux d'entrée. Au-delà de
+    CAPTURE_STREAMS_PER_PROCESS entrées, le décodage est réparti sur des
+    processus de travail. Les énoncés finaux sont étiquetés par source et
+    fusionnés dans une chronologie commune (`timeline`).
+    """
+
+    def __init__(self, engine, inputs, processes=None):
+        self.engine = engine
+        self.inputs = inputs
+        if processes is None:
+            processes = 0
+            if len(inputs) > CAPTURE_STREAMS_PER_PROCESS:
+                processes = min(-(-len(inputs) // CAPTURE_STREAMS_PER_PROCESS), os.cpu_count() or 1)
+        self.processes = processes
+        self.workers = []
+        self.sources = self._build_sources(inputs)
+        self.timeline = []  # (début, ordre d'arrivée, événement)
+        self.started = None
+
+    @staticmethod
+    def _build_sources(inputs):
+        shared = {}
+        for spec in inputs:
+            if spec["channel"] is not None:
+                channels = max(s["channel"] for s in inputs
+                               if s["device"] == spec["device"] and s["channel"] is not None) + 1
+                shared.setdefault(spec["device"], SharedInputStream(spec["device"], channels))
+        sources = []
+        for spec in inputs:
+            if spec["file"] is not None:
+                sources.append(WavFileSource(spec["file"], realtime=True))
+            elif spec["channel"] is not None:
+                sources.append(ChannelSource(shared[spec["device"]], spec["channel"]))
+            else:
+                sources.append(MicrophoneSource(device=spec["device"]))
+        return sources
+
+    def stop(self):
+        for source in self.sources:
+            source.stop()
+
+    async def _pump(self, index, merged):
+        spec, source = self.inputs[index], self.sources[index]
+        decoder = self.workers[index % len(self.workers)] if self.workers else self.engine
+        try:
+            async for event in decoder.listen(source, spec["lang"], continuous=True):
+                await merged.put(dict(event, source=spec["label"]))
+        except Exception as e:
+            await merged.put({"type": "error", "source": spec["label"], "error": f"{type(e).__name__}: {e}"})
+        finally:
+            source.stop()
+            await merged.put(None)
+
+    async def events(self):
+        """Itère sur les événements de toutes les entrées au fil de leur arrivée"""
+        self.workers = [DecodeProcess() for _ in range(self.processes)]
+        self.started = time.time()
+        merged = asyncio.Queue()
+        tasks = [asyncio.ensure_future(self._pump(i, merged)) for i in range(len(self.inputs))]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                event = await merged.get()
+                if event is None:
+                    remaining -= 1
+                    continue
+                if event["type"] == "final":
+                    event["timestamp"] = datetime.fromtimestamp(self.started + event["start"]).isoformat(
+                        timespec="milliseconds")
+                    bisect.insort(self.timeline, (event["start"], len(self.timeline), event))
+                yield event
+        finally:
+            self.stop()
+            for task in tasks:
+                task.cancel()
+            for worker in self.workers:
+                worker.close()
+
+def capture_main(argv):
+    """Point d'entrée de la commande `speak.py capture`"""
+    parser = argparse.ArgumentParser(prog="speak.py capture",
+                                     description="Transcrit simultanément plusieurs micros ou canaux")
+    parser.add_argument("--input", action="append", default=[], metavar="SPEC",
+                        help="entrée 'label=NOM,device=N,channel=C,lang=fr' ou 'file=CHEMIN.wav,lang=fr' "
+                             "(répétable)")
+    parser.add_argument("--processes", type=int,
+                        help=f"processus de décodage (défaut: 1 par {CAPTURE_STREAMS_PER_PROCESS} entrées "
+                             "au-delà de la première tranche)")
+    parser.add_argument("--duration", type=float, help="durée de la capture en secondes")
+    parser.add_argument("--list-devices", action="store_true", help="liste les périphériques audio")
+    parser.add_argument("-o", "--output", help="chronologie fusionnée écrite à la fin (JSONL)")
+    args = parser.parse_args(argv)
+    
+    if args.list_devices:
+        import sounddevice as sd
+        print(sd.query_devices())
+        return 0
+    try:
+        inputs = [parse_capture_input(text) for text in args.input or ["label=default"]]
+    except ValueError as e:
+        parser.error(str(e))
+    
+    engine = SpeechEngine(ModelRegistry(pool_size=min(len(inputs), CAPTURE_STREAMS_PER_PROCESS)),
+                          tts=False)
+    capture = MultiCapture(engine, inputs, args.processes)
+    
+    async def run():
+        if args.duration:
+            asyncio.get_running_loop().call_later(args.duration, capture.stop)
+        async for event in capture.events():
+            if event["type"] != "partial":
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for _, _, event in capture.timeline:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    return 0
+
+# ===== MESURES DE PERFORMANCE =====
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (Mo)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Octets sous macOS, kilo-octets ailleurs
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import ctypes
+        from ctypes import wintypes
+        
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+
+def latency_summary(latencies, audio_seconds, elapsed):
+    """Résume une série de mesures: RTF, percentiles de latence, débit"""
+    import numpy as np
+    latencies_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "utterances": len(latencies),
+        "audio_s": round(audio_seconds, 3),
+        "elapsed_s": round(elapsed, 3),
+        "rtf": round(elapsed / audio_seconds, 4) if audio_seconds else None,
+        "latency_p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "latency_p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+        "throughput_x": round(audio_seconds / elapsed, 2) if elapsed else None,
+    }
+
+def bench_fixtures(paths, count):
+    """Énoncés de test: fichiers fournis ou pseudo-parole générée"""
+    if paths:
+        return [read_audio(path) for path in find_audio_files(paths)]
+    return [SyntheticSource(duration=4.0, pattern=((0.3, False), (3.2, True), (0.5, False)),
+                            seed=seed).generate().tobytes() for seed in range(count)]
+
+def _timed_blocks(audio_data, marks):
+    """Découpe un tampon en blocs et note l'instant où le dernier a été consommé"""
+    view = memoryview(audio_data)
+    step = BLOCK_SIZE * 2
+    for offset in range(0, len(view), step):
+        yield view[offset:offset + step]
+    marks["input_end"] = time.perf_counter()
+
+def bench_decode(engine, fixtures, lang, streaming):
+    """Fenêtre fixe ou flux: latence entre la fin de l'audio et le texte final"""
+    latencies = []
+    start = time.perf_counter()
+    for audio_data in fixtures:
+        marks = {}
+        for event in engine.recognize_stream(_timed_blocks(audio_data, marks), lang,
+                                             continuous=False, streaming=streaming):
+            if event["type"] == "final":
+                latencies.append(time.perf_counter() - marks["input_end"])
+    elapsed = time.perf_counter() - start
+    audio_seconds = sum(len(a) for a in fixtures) / 2 / SAMPLE_RATE
+    return latency_summary(latencies, audio_seconds, elapsed)
+
+def bench_concurrent(engine, fixtures, lang, streams):
+    """Débit de `streams` flux décodés en parallèle dans une même boucle asyncio"""
+    async def run_stream(index):
+        latencies = []
+        for audio_data in fixtures[index::streams] or fixtures[:1]:
+            marks = {}
+            async for event in engine.listen(_timed_blocks(audio_data, marks), lang, continuous=False):
+                if event["type"] == "final":
+                    latencies.append(time.perf_counter() - marks["input_end"])
+        return latencies
+    
+    async def run_all():
+        return await asyncio.gather(*(run_stream(i) for i in range(streams)))
+    
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    latencies = [latency for stream in results for latency in stream]
+    audio_seconds = sum(len(audio_data) for index in range(streams)
+                        for audio_data in fixtures[index::streams] or fixtures[:1]) / 2 / SAMPLE_RATE
+    summary = latency_summary(latencies, audio_seconds, elapsed)
+    summary["streams"] = streams
+    return summary
+
+def bench_tts(texts, lang):
+    """Temps de rendu TTS d'un texte nouveau puis du même texte en cache"""
+    import numpy as np
+    worker = TTSWorker()
+    try:
+        timings = {"cold": [], "cached": []}
+        for kind in ("cold", "cached"):
+            for text in texts:
+                start = time.perf_counter()
+                worker.prepare(text, lang).result()
+                timings[kind].append(time.perf_counter() - start)
+        return {
+            "render_p50_ms": round(float(np.percentile(timings["cold"], 50)) * 1000, 2),
+            "cached_p50_ms": round(float(np.percentile(timings["cached"], 50)) * 1000, 2),
+        }
+    finally:
+        worker.close()
+
+# Sens d'amélioration des métriques comparées
+LOWER_IS_BETTER = ("rtf", "_ms", "_mb", "load_s")
+HIGHER_IS_BETTER = ("throughput_x",)
+
+def compare_bench(current, baseline, tolerance):
+    """Liste les métriques dégradées de plus de `tolerance` par rapport à une référence"""
+    regressions = []
+    for stage, metrics in current["results"].items():
+        reference = baseline.get("results", {}).get(stage, {})
+        for name, value in metrics.items():
+            old = reference.get(name)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / abs(old)
+            if name.endswith(HIGHER_IS_BETTER):
+                change = -change
+            elif not name.endswith(LOWER_IS_BETTER):
+                continue
+            if change > tolerance:
+                regressions.append({"stage": stage, "metric": name, "baseline": old,
+                                    "current": value, "change": round(change, 4)})
+    return regressions
+
+def bench_main(argv):
+    """Point d'entrée de la commande `speak.py bench`"""
+    parser = argparse.ArgumentParser(prog="speak.py bench",
+                                     description="Mesure RTF, latence, mémoire et débit de la chaîne")
+    parser.add_argument("--audio", nargs="*", help="fichiers ou dossiers WAV (défaut: audio généré)")
+    parser.add_argument("--utterances", type=int, default=8, help="énoncés générés")
+    parser.add_argument("--lang", default="fr", choices=list(MODEL_DIRS))
+    parser.add_argument("--streams", type=int, default=4, help="flux simultanés")
+    parser.add_argument("--skip-tts", action="store_true")
+    parser.add_argument("-o", "--output", default="bench.json", help="fichier JSON de résultats")
+    parser.add_argument("--baseline", help="résultats précédents à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="dégradation relative tolérée avant de signaler une régression")
+    args = parser.parse_args(argv)
+    
+    fixtures = bench_fixtures(args.audio, args.utterances)
+    results = {}
+    
+    # Chargement des modèles depuis un registre vide
+    registry = ModelRegistry(pool_size=max(1, args.streams))
+    load = {}
+    for code in registry.languages():
+        start = time.perf_counter()
+        registry.get(code)
+        load[f"{code}_load_s"] = round(time.perf_counter() - start, 3)
+    results["model_load"] = dict(load, peak_rss_mb=round(peak_rss_mb(), 1))
+    
+    engine = SpeechEngine(registry, tts=False)
+    results["window"] = bench_decode(engine, fixtures, args.lang, streaming=False)
+    results["streaming"] = bench_decode(engine, fixtures, args.lang, streaming=True)
+    results["auto"] = bench_decode(engine, fixtures, "auto", streaming=True)
+    results["concurrent"] = bench_concurrent(engine, fixtures, args.lang, args.streams)
+    results["recognizer_pools"] = {f"{code}_{key}": value for code, stats in registry.stats().items()
+                                   for key, value in stats.items()}
+    if not args.skip_tts:
+        try:
+            results["tts"] = bench_tts(["Bonjour, ceci est un test de synthèse vocale.",
+                                        "Les résultats sont prêts."], args.lang)
+        except Exception as e:
+            results["tts"] = {"error": str(e)}
+    
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpus": os.cpu_count(),
+        "config": {"lang": args.lang, "fixtures": len(fixtures), "streams": args.streams,
+                   "block_size": BLOCK_SIZE, "synthetic": not args.audio},
+        "results": results,
+        "stages": METRICS.snapshot(),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_bench(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']}.{regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']} (+{regression['change']:.0%})")
+        return 1 if regressions else 0
+    return 0
 
 # Fonction principale
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    setup_vosk_environment()
+    commands = {"transcribe": transcribe_main, "serve": serve_main, "client": client_main,
+                "capture": capture_main, "bench": bench_main}
+    if argv and argv[0] in commands:
+        return commands[argv[0]](argv[1:])
+    
+    parser = argparse.ArgumentParser(prog="speak.py",
+                                     description="Assistant vocal multilingue "
+                                                 f"(commandes: {', '.join(commands)})")
+    parser.add_argument("--debug", action="store_true",
+                        help="affiche les latences du dernier énoncé dans la barre de statut")
+    parser.add_argument("--metrics-file", help="fichier de métriques réécrit après chaque énoncé "
+                                               "(JSON si .json, sinon format Prometheus)")
+    parser.add_argument("--metrics-port", type=int, help="expose les métriques en HTTP sur ce port")
+    args = parser.parse_args(argv)
+    
     root = ctk.CTk()
-    app = VoiceRecognitionApp(root)
+    app = VoiceRecognitionApp(root, debug=args.debug, metrics_file=args.metrics_file,
+                              metrics_port=args.metrics_port)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()
+    sys.exit(main())
\ No newline at end of file
@@ -10,11 +10,48 @@
 # models/vosk-model-small-en-us-0.15/
 #
 # Et que l'icône icon11.ico est dans le dossier courant
+#
+# Les modèles ne sont plus inclus dans l'exécutable (ils seraient extraits
+# à chaque lancement) : ils sont compressés en archives zip copiées dans
+# dist/models/ avec un manifeste sha256. Au premier lancement, l'application
+# les vérifie et les extrait une seule fois dans son dossier de données.
+# Distribuer speak.exe avec le dossier models/ voisin.
 # =====================================================
 
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+
 from PyInstaller.utils.hooks import collect_data_files
 
-datas = [('models/vosk-model-small-fr-0.22', 'models/vosk-model-small-fr-0.22'), ('models/vosk-model-small-en-us-0.15', 'models/vosk-model-small-en-us-0.15'), ('icon.ico', '.')]
+MODEL_DIRS = ['vosk-model-small-fr-0.22', 'vosk-model-small-en-us-0.15']
+
+
+def build_model_archive(name, out_dir):
+    """Compresse un dossier de modèle et retourne son empreinte sha256"""
+    source = os.path.join('models', name)
+    archive = os.path.join(out_dir, name + '.zip')
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for dirpath, _, filenames in os.walk(source):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                zf.write(path, os.path.relpath(path, source))
+    digest = hashlib.sha256()
+    with open(archive, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'archive': name + '.zip', 'sha256': digest.hexdigest(), 'size': os.path.getsize(archive)}
+
+
+model_build_dir = os.path.join(workpath, 'models')
+os.makedirs(model_build_dir, exist_ok=True)
+manifest = {name: build_model_archive(name, model_build_dir) for name in MODEL_DIRS}
+with open(os.path.join(model_build_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+    json.dump(manifest, f, indent=2)
+
+datas = [('icon.ico', '.')]
 datas += collect_data_files('vosk')
 
 
@@ -54,3 +91,6 @@ exe = EXE(
     entitlements_file=None,
     icon=['icon11.ico'],
 )
+
+# Archives des modèles à côté de l'exécutable
+shutil.copytree(model_build_dir, os.path.join(DISTPATH, 'models'), dirs_exist_ok=True)
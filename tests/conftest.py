@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speak  # noqa: E402
+
+class FakeModel:
+    """Modèle factice: chaque mot reconnu porte le nom et la confiance du modèle"""
+
+    def __init__(self, name, conf):
+        self.name = name
+        self.conf = conf
+
+class FakeRecognizer:
+    """Recognizer factice: un mot par demi-seconde d'audio, jamais de fin de phrase"""
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.model = model
+        self.fed = 0
+        self.partial_words = False
+
+    def SetWords(self, enabled):
+        pass
+
+    def SetPartialWords(self, enabled):
+        self.partial_words = enabled
+
+    def Reset(self):
+        self.fed = 0
+
+    def AcceptWaveform(self, data):
+        self.fed += len(data)
+        return False
+
+    def _words(self):
+        return [{"word": self.model.name, "conf": self.model.conf, "start": i * 0.5, "end": i * 0.5 + 0.5}
+                for i in range(self.fed // 16000)]
+
+    def PartialResult(self):
+        words = self._words()
+        result = {"partial": " ".join(word["word"] for word in words)}
+        if self.partial_words:
+            result["partial_result"] = words
+        return json.dumps(result)
+
+    def FinalResult(self):
+        words = self._words()
+        self.fed = 0
+        return json.dumps({"text": " ".join(word["word"] for word in words), "result": words})
+
+@pytest.fixture
+def fake_vosk(monkeypatch):
+    monkeypatch.setattr("vosk.KaldiRecognizer", FakeRecognizer)
+    return FakeModel
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, fake_vosk):
+    """Registre de deux modèles factices; le budget mémoire n'en tient qu'un"""
+    monkeypatch.setattr("vosk.Model", lambda path: FakeModel(os.path.basename(path), 0.9))
+    (tmp_path / "models").mkdir()
+    for name in ("fr", "en"):
+        directory = tmp_path / "models" / name
+        directory.mkdir()
+        (directory / "final.mdl").write_bytes(b"\0" * 600 * 1024)
+    cache = speak.ModelCache(root=str(tmp_path / "cache"), search_dirs=[str(tmp_path)])
+    return speak.ModelRegistry({"fr": "fr", "en": "en"}, memory_budget_mb=1, pool_size=1, cache=cache)
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
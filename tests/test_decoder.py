@@ -0,0 +1,51 @@
+import pytest
+
+import speak
+from conftest import wait_for
+
+CHUNK = b"\0" * 8000  # 0,25 s
+
+def make_decoder(FakeModel):
+    # "en" en premier: le choix ne doit pas dépendre de l'ordre des langues
+    return speak.UtteranceDecoder({
+        "en": speak.RecognizerPool(FakeModel("en", 0.74), 1),
+        "fr": speak.RecognizerPool(FakeModel("fr", 0.9), 1),
+    })
+
+def wait_decoded(decoder, words):
+    """Attend que chaque langue en lice ait décodé au moins `words` mots"""
+    wait_for(lambda: all(len(track.partial.get("partial", "").split()) >= words
+                         for track in decoder.live_tracks()))
+
+def test_partial_prefers_most_confident_language(fake_vosk):
+    decoder = make_decoder(fake_vosk)
+    for _ in range(6):
+        decoder.accept(CHUNK)
+    assert set(decoder.workers) == {"en", "fr"}  # identification ambiguë
+    wait_decoded(decoder, 3)
+    assert decoder.partial().split()[0] == "fr"
+    decoder.finish()
+
+def test_prune_fires_before_finish(fake_vosk):
+    decoder = make_decoder(fake_vosk)
+    for _ in range(4):
+        decoder.accept(CHUNK)
+    assert set(decoder.workers) == {"en", "fr"}
+    sent = 4
+    while not decoder.tracks["en"].cancelled and sent < 16:
+        # Laisser les fils décoder tout l'audio reçu avant le bloc suivant
+        wait_decoded(decoder, sent * len(CHUNK) // 16000)
+        decoder.accept(CHUNK)
+        sent += 1
+    assert decoder.tracks["en"].cancelled
+    decoder.finish()
+    assert decoder.result["lang"] == "fr"
+
+def test_recognize_audio_releases_recognizers_on_error(fake_vosk, monkeypatch):
+    pool = speak.RecognizerPool(fake_vosk("fr", 0.9), 1)
+    def fail(self, data):
+        raise RuntimeError("decode failed")
+    monkeypatch.setattr(type(pool.idle[0]), "AcceptWaveform", fail)
+    with pytest.raises(RuntimeError):
+        speak.recognize_audio({"fr": pool}, CHUNK)
+    assert pool.in_use == 0
@@ -0,0 +1,28 @@
+import pytest
+
+import speak
+
+@pytest.fixture(params=[True, False], ids=["fts", "like"])
+def store(request, tmp_path):
+    store = speak.HistoryStore(str(tmp_path / "history.db"))
+    if request.param and not store.fts:
+        pytest.skip("sqlite3 without FTS5")
+    if not request.param:
+        store.fts = False  # comme un sqlite3 compilé sans FTS5
+    for i in range(10):
+        store.add("fr", f"bonjour numéro {i}" if i % 2 else f"au revoir numéro {i}", created=1000.0 + i)
+    return store
+
+def test_search_by_prefix_and_page(store):
+    assert store.count() == 10
+    assert store.count("bonj") == 5
+    page = store.page(2, 2, "bonj")
+    assert [text for _, _, _, text in page] == ["bonjour numéro 5", "bonjour numéro 7"]
+    assert [entry_id for entry_id, _, _, _ in store.page(8, 5)] == [9, 10]
+
+def test_search_follows_updates_and_deletes(store):
+    store.update(2, "en", "hello number 1")
+    assert store.count("bonj") == 4
+    assert store.page(0, 10, "hel") == [(2, 1001.0, "en", "hello number 1")]
+    store.clear()
+    assert store.count("hel") == 0
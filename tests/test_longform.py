@@ -0,0 +1,51 @@
+import wave
+
+import numpy as np
+import pytest
+
+import speak
+
+def test_chunked_conversion_matches_one_shot_resampling(tmp_path, monkeypatch):
+    monkeypatch.setattr(speak, "CONVERT_BLOCK_FRAMES", 1000)
+    rng = np.random.default_rng(0)
+    frames = 2 * 1000 + 123  # plusieurs jonctions entre blocs
+    stereo = rng.integers(-20000, 20000, size=(frames, 2)).astype(np.int16)
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(44100)
+        wf.writeframes(stereo.tobytes())
+
+    mono = stereo.mean(axis=1)
+    expected = np.interp(np.arange(0, frames, 44100 / speak.SAMPLE_RATE), np.arange(frames), mono)
+    converted = np.frombuffer(speak.read_audio(str(path)), dtype=np.int16)
+    assert len(converted) == len(expected)
+    assert np.abs(converted.astype(int) - expected.astype(np.int16)).max() <= 1
+
+@pytest.mark.parametrize("pattern", [((0.5, False), (7.0, True)), ((1.0, True),)])
+def test_segments_cut_in_silences_within_max_length(pattern):
+    samples = speak.SyntheticSource(duration=150.0, pattern=pattern).generate()
+    segments = speak.plan_segments(samples)
+    assert segments[0][1] == 0 and segments[-1][2] == len(samples)
+    for (_, _, end), (_, start, _) in zip(segments, segments[1:]):
+        assert end == start
+    for _, start, end in segments:
+        assert end - start <= speak.LONGFORM_MAX_SEGMENT_S * speak.SAMPLE_RATE
+    if len(pattern) > 1:
+        cycle = sum(seconds for seconds, _ in pattern)
+        for _, start, _ in segments[1:]:
+            assert (start / speak.SAMPLE_RATE) % cycle < pattern[0][0]  # dans le silence
+
+def test_segment_words_use_absolute_times(registry, tmp_path, monkeypatch):
+    path = tmp_path / "audio.pcm"
+    path.write_bytes(b"\0" * speak.SAMPLE_RATE * 2 * 10)
+    monkeypatch.setattr(speak, "_worker_engine", speak.SpeechEngine(registry, tts=False))
+    monkeypatch.setattr(speak, "_worker_lang", "fr")
+    monkeypatch.setattr(speak, "_worker_audio", None)
+
+    region = (str(path), 0, speak.SAMPLE_RATE * 10)
+    segment = speak.transcribe_segment((1, 2 * speak.SAMPLE_RATE, 6 * speak.SAMPLE_RATE, region))
+    assert (segment["index"], segment["start"], segment["end"]) == (1, 2.0, 6.0)
+    assert [word["start"] for word in segment["words"]] == [2.0 + i * 0.5 for i in range(8)]
+    assert segment["words"][-1]["end"] == 6.0
@@ -0,0 +1,36 @@
+import speak
+
+def make_metrics():
+    metrics = speak.LatencyMetrics(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.05, 2.0):
+        metrics.observe("decode", seconds)
+    metrics.observe("queue", 0.001)
+    return metrics
+
+def test_quantiles_and_snapshot():
+    metrics = make_metrics()
+    assert metrics.quantile("decode", 0.25) == 0.01
+    assert metrics.quantile("decode", 0.5) == 0.1
+    assert metrics.quantile("decode", 0.95) == 2.0  # au-delà du dernier seau: le maximum
+    assert metrics.quantile("queue", 0.5) == 0.001  # borné par le maximum observé
+    assert metrics.quantile("tts_play", 0.5) is None
+
+    decode = metrics.snapshot()["decode"]
+    assert decode["count"] == 4
+    assert decode["mean_ms"] == 526.25
+    assert (decode["p50_ms"], decode["p95_ms"], decode["max_ms"], decode["last_ms"]) == (100.0, 2000.0, 2000.0, 2000.0)
+    assert decode["buckets"] == {"0.01": 1, "0.1": 3, "1.0": 3, "+Inf": 4}
+
+def test_prometheus_histogram_text():
+    name = f"{speak.APP_NAME}_stage_latency_seconds"
+    lines = make_metrics().prometheus().splitlines()
+    assert lines[:2] == [f"# HELP {name} Latency of each pipeline stage", f"# TYPE {name} histogram"]
+    assert lines[2:8] == [
+        f'{name}_bucket{{stage="decode",le="0.01"}} 1',
+        f'{name}_bucket{{stage="decode",le="0.1"}} 3',
+        f'{name}_bucket{{stage="decode",le="1.0"}} 3',
+        f'{name}_bucket{{stage="decode",le="+Inf"}} 4',
+        f'{name}_sum{{stage="decode"}} 2.105000',
+        f'{name}_count{{stage="decode"}} 4',
+    ]
+    assert f'{name}_count{{stage="queue"}} 1' in lines
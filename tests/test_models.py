@@ -0,0 +1,49 @@
+import os
+import time
+import zipfile
+
+import speak
+
+def test_grammar_pool_evicted_with_model(registry):
+    pool = registry.grammar_pool("fr", '["allume"]')
+    assert registry.grammar_pool("fr", '["allume"]') is pool
+    assert registry.grammar_pool("fr", '["éteins"]') is not pool
+
+    registry.get("en")  # dépasse le budget: "fr" est évincé
+    assert not registry.is_loaded("fr")
+    assert "fr" not in registry.grammar_pools
+
+def make_archive(tmp_path, name):
+    (tmp_path / "models").mkdir(exist_ok=True)
+    archive = tmp_path / "models" / f"{name}.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("final.mdl", b"\0" * 1024)
+    return str(archive)
+
+def test_extract_waits_for_extraction_by_another_process(tmp_path, monkeypatch):
+    cache = speak.ModelCache(root=str(tmp_path / "cache"), search_dirs=[str(tmp_path)])
+    archive = make_archive(tmp_path, "fr")
+    checksum = speak.file_sha256(archive)
+    target = cache.extract("fr", archive, checksum)
+    os.remove(os.path.join(target, ".complete"))
+    # Verrou récent d'un autre processus qui termine l'extraction pendant l'attente
+    open(f"{target}.lock", "w").close()
+    monkeypatch.setattr(speak.time, "sleep", lambda _: open(os.path.join(target, ".complete"), "w").close())
+    monkeypatch.setattr(speak.zipfile, "ZipFile", None)  # aucune extraction ici
+
+    assert cache.extract("fr", archive, checksum) == target
+    assert os.path.exists(f"{target}.lock")
+
+def test_extract_takes_over_stale_lock(tmp_path):
+    cache = speak.ModelCache(root=str(tmp_path / "cache"), search_dirs=[str(tmp_path)])
+    archive = make_archive(tmp_path, "fr")
+    checksum = speak.file_sha256(archive)
+    os.makedirs(cache.root)
+    lock_path = os.path.join(cache.root, f"fr-{checksum[:16]}.lock")
+    open(lock_path, "w").close()
+    stale = time.time() - speak.MODEL_LOCK_STALE_S - 1
+    os.utime(lock_path, (stale, stale))
+
+    target = cache.extract("fr", archive, checksum)
+    assert os.path.exists(os.path.join(target, "final.mdl"))
+    assert not os.path.exists(lock_path)
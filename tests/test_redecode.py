@@ -0,0 +1,34 @@
+import speak
+
+AUDIO = b"\0" * speak.SAMPLE_RATE * 2  # 1 s
+
+def test_redecode_does_not_wait_behind_prefetch(registry):
+    engine = speak.SpeechEngine(registry, tts=False)
+    audio_id = engine.recent.add(AUDIO, {"lang": "fr", "text": ""})
+    # Énoncé suivant en cours de décodage: les décodages d'avance attendent
+    pool = registry.pool("en")
+    recognizer = pool.acquire()
+    try:
+        engine.prefetch(audio_id, ["en"])
+        prefetch = engine.prefetches[0]
+        result = engine.redecode(audio_id, "en").result(timeout=2)
+        assert result["lang"] == "en"
+        assert not prefetch.done()
+    finally:
+        pool.release(recognizer)
+
+def test_prefetch_superseded_by_next_utterance(registry):
+    engine = speak.SpeechEngine(registry, tts=False)
+    first = engine.recent.add(AUDIO, {"lang": "fr", "text": ""})
+    second = engine.recent.add(AUDIO, {"lang": "fr", "text": ""})
+    pool = registry.pool("en")
+    recognizer = pool.acquire()
+    try:
+        engine.prefetch(first, ["en"])
+        stale = engine.prefetches[0]
+        engine.prefetch(second, ["en"])
+        assert stale.cancelled() or stale.result(timeout=2) is None
+    finally:
+        pool.release(recognizer)
+    assert engine.prefetches[0].result(timeout=2)["lang"] == "en"
+    assert engine.recent.result(first, "en") is None
@@ -0,0 +1,54 @@
+import asyncio
+import io
+import json
+import wave
+
+import pytest
+
+import speak
+
+@pytest.fixture
+def speech_file(tmp_path):
+    """Enregistrement synthétique: deux énoncés séparés par un silence"""
+    samples = speak.SyntheticSource(duration=6.0, pattern=((1.0, False), (2.0, True))).generate()
+    path = tmp_path / "speech.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(speak.SAMPLE_RATE)
+        wf.writeframes(samples.tobytes())
+    return str(path)
+
+def replay(registry, paths, lang="fr", max_sessions=speak.SERVER_MAX_SESSIONS):
+    """Rejoue des fichiers en parallèle vers un serveur local, retourne (statuts, événements)"""
+    server = speak.TranscriptionServer(speak.SpeechEngine(registry, tts=False), max_sessions)
+    out = io.StringIO()
+
+    async def run():
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            return await asyncio.gather(*(speak.replay_file(path, "127.0.0.1", port, lang, 0, out)
+                                          for path in paths))
+    statuses = asyncio.run(run())
+    return statuses, [json.loads(line) for line in out.getvalue().splitlines()]
+
+def test_session_streams_partial_and_final_events(registry, speech_file):
+    statuses, events = replay(registry, [speech_file])
+    assert statuses == [True]
+    assert {event["type"] for event in events} == {"partial", "final"}
+    finals = [event for event in events if event["type"] == "final"]
+    assert len(finals) == 2
+    assert all(event["file"] == speech_file and event["lang"] == "fr" for event in finals)
+    assert finals[0]["end"] <= finals[1]["start"]
+
+def test_sessions_over_the_cap_wait_for_a_free_slot(registry, speech_file):
+    statuses, events = replay(registry, [speech_file] * 3, max_sessions=1)
+    assert statuses == [True, True, True]
+    assert not [event for event in events if event["type"] == "error"]
+    assert sum(event["type"] == "final" for event in events) == 6
+
+def test_unknown_language_reports_an_error(registry, speech_file):
+    statuses, events = replay(registry, [speech_file], lang="de")
+    assert statuses == [False]
+    assert events == [{"type": "error", "error": "unknown language: de", "file": speech_file}]
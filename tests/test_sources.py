@@ -0,0 +1,48 @@
+import asyncio
+import wave
+
+import speak
+
+def listen(engine, source, **kwargs):
+    async def collect():
+        return [event async for event in engine.listen(source, "fr", **kwargs)]
+    return asyncio.run(collect())
+
+def test_listen_flushes_stale_audio_on_session_start(registry):
+    engine = speak.SpeechEngine(registry, tts=False)
+    source = speak.SyntheticSource(duration=2.0)
+    # Audio resté dans le tampon d'une session précédente
+    source.push(b"\1\0" * speak.SAMPLE_RATE)
+
+    events = listen(engine, source, continuous=False)
+    final = events[-1]
+    assert final["type"] == "final"
+    assert final["end"] == 2.0
+    assert len(final["words"]) == 4  # un mot par demi-seconde décodée
+    assert source.stats()["dropped"] == 0
+
+def test_listen_counts_blocks_dropped_by_live_source(registry):
+    engine = speak.SpeechEngine(registry, tts=False)
+    # Le producteur génère 60 blocs d'un coup dans un tampon de 2 blocs
+    source = speak.SyntheticSource(duration=30.0, pattern=((1.0, True),), capacity=2)
+    source.live = True  # comme un micro: pas de contre-pression sur le producteur
+
+    events = listen(engine, source, continuous=False)
+    stats = source.stats()
+    assert stats["dropped"] > 0
+    assert stats["written"] + stats["dropped"] == 30 * speak.SAMPLE_RATE // speak.BLOCK_SIZE
+    # Seuls les blocs écrits ont été décodés: un mot par bloc d'une demi-seconde
+    assert len(events[-1]["words"]) == stats["written"]
+
+def test_listen_from_converted_wav_file(registry, tmp_path):
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(44100)
+        wf.writeframes(b"\0\0" * 2 * 44100 * 3)
+    engine = speak.SpeechEngine(registry, tts=False)
+
+    events = listen(engine, speak.WavFileSource(str(path)), continuous=False)
+    assert events[-1]["end"] == 3.0
+    assert len(events[-1]["words"]) == 6